@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -5,13 +6,111 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SERP_API_KEY = os.getenv("SERP_API_KEY")
+# Optional SerpAPI-compatible host for shopping searches (the offline benchmarks point it at a local fake)
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL")
 DATABASE_URL = os.getenv("DATABASE_URL")    
 OPENAI_MODEL = "gpt-4o-mini"
 REASONING_MODEL = "o1-mini"
 
+# Optional Redis URL so several bot processes share the same rate-limit buckets (needs `pip install redis`)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Seconds a rate-limit check may wait on Redis before falling back to in-memory buckets
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
 
+# Sharding: AUTO_SHARD runs every shard in one process, SHARD_IDS/SHARD_COUNT pin
+# this process to one cluster of shards (set by launcher.py)
+AUTO_SHARD = os.getenv("AUTO_SHARD", "").lower() in ("1", "true", "yes")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard) for shard in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "1"))
 
+# Start the render workers and import their libraries after login instead of on first use
+WARM_UP_IMPORTS = os.getenv("WARM_UP_IMPORTS", "1").lower() in ("1", "true", "yes")
 
+# Opt-in tracemalloc profiling (also enabled by running bot.py --memory-profile)
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "").lower() in ("1", "true", "yes")
+MEMORY_SNAPSHOT_INTERVAL = int(os.getenv("MEMORY_SNAPSHOT_INTERVAL", "300"))
+MEMORY_TOP_N = int(os.getenv("MEMORY_TOP_N", "10"))
 
+# Worker pool used to render !wrapped images off the event loop
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_USE_PROCESSES = os.getenv("RENDER_USE_PROCESSES", "1").lower() in ("1", "true", "yes")
 
+# Embeds use Google Shopping thumbnails; scraping the product page for og:image is an opt-in fallback
+PREVIEW_IMAGE_SCRAPING = os.getenv("PREVIEW_IMAGE_SCRAPING", "").lower() in ("1", "true", "yes")
 
+# Cache of model responses: which OpenAIService methods are cached, for how long, and an optional SQLite file
+LLM_CACHE_METHODS = [m.strip() for m in os.getenv("LLM_CACHE_METHODS", "parse_query,parse_multi_item_query,get_recommendations,parse_and_recommend").split(",") if m.strip()]
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH")
+
+# Serve near-duplicate queries (same region and price bucket) from recent results
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "1800"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+
+# "sequential" parses the query and generates items in separate model calls; "merged" does both in one
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "sequential").lower()
+
+# Attempts per structured model call before giving up, and the base delay between them
+STRUCTURED_OUTPUT_MAX_ATTEMPTS = int(os.getenv("STRUCTURED_OUTPUT_MAX_ATTEMPTS", "3"))
+STRUCTURED_OUTPUT_RETRY_DELAY = float(os.getenv("STRUCTURED_OUTPUT_RETRY_DELAY", "0.5"))
+
+# Connection pool shared by every OpenAI client in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "1").lower() in ("1", "true", "yes")
+
+# Rolling per-channel chat buffer read by !feeling_lucky instead of fetching channel history;
+# CHANNEL_BUFFER_MAX_CHANNELS also caps how many channels keep any chat context at all
+CHANNEL_BUFFER_SIZE = int(os.getenv("CHANNEL_BUFFER_SIZE", "50"))
+CHANNEL_BUFFER_MIN_MESSAGES = int(os.getenv("CHANNEL_BUFFER_MIN_MESSAGES", "20"))
+CHANNEL_BUFFER_MAX_CHANNELS = int(os.getenv("CHANNEL_BUFFER_MAX_CHANNELS", "5000"))
+
+# Span tracing of pipeline stages: "console", "json" (appended to TRACING_FILE), "otel", or unset for off
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+
+# Prometheus-style metrics served at http://METRICS_HOST:METRICS_PORT/metrics (off unless a port is set);
+# launcher.py gives cluster N the port METRICS_PORT + N
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "1.0"))
+
+# Event loop watchdog for staging: reports callbacks that block the loop longer than the threshold
+# (also enabled by running bot.py --loop-watchdog)
+LOOP_WATCHDOG = os.getenv("LOOP_WATCHDOG", "").lower() in ("1", "true", "yes")
+LOOP_WATCHDOG_THRESHOLD = float(os.getenv("LOOP_WATCHDOG_THRESHOLD", "0.25"))
+LOOP_WATCHDOG_ASYNCIO_DEBUG = os.getenv("LOOP_WATCHDOG_ASYNCIO_DEBUG", "1").lower() in ("1", "true", "yes")
+
+# Model prices in USD per million (input, output) tokens, matched by model name prefix.
+# LLM_TOKEN_PRICES takes JSON like {"gpt-4o-mini": [0.15, 0.6]} to add or override entries
+LLM_TOKEN_PRICES = {"gpt-4o-mini": (0.15, 0.60), "gpt-4o": (2.50, 10.00), "o1-mini": (1.10, 4.40)}
+LLM_TOKEN_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_TOKEN_PRICES", "{}")).items()})
+
+# Per user/guild/command token usage, written to the llm_usage table in batches
+USAGE_LEDGER_ENABLED = os.getenv("USAGE_LEDGER_ENABLED", "1").lower() in ("1", "true", "yes")
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "30"))
+USAGE_FLUSH_BATCH = int(os.getenv("USAGE_FLUSH_BATCH", "200"))
+
+# Quotas for commands that start upstream work (!find, !multi_find, !wrapped, !feeling_lucky); 0 turns a limit off.
+# QUOTA_COMMAND_COSTS weighs commands by the pipelines they run, as "command=units,..."
+QUOTA_USER_CONCURRENCY = int(os.getenv("QUOTA_USER_CONCURRENCY", "1"))
+QUOTA_GUILD_PER_MINUTE = int(os.getenv("QUOTA_GUILD_PER_MINUTE", "20"))
+QUOTA_GLOBAL_IN_FLIGHT = int(os.getenv("QUOTA_GLOBAL_IN_FLIGHT", "20"))
+QUOTA_MAX_QUEUE = int(os.getenv("QUOTA_MAX_QUEUE", "50"))
+QUOTA_QUEUE_TIMEOUT = float(os.getenv("QUOTA_QUEUE_TIMEOUT", "60"))
+QUOTA_COMMAND_COSTS = {
+    command.strip(): int(units)
+    for command, units in (pair.split("=") for pair in os.getenv("QUOTA_COMMAND_COSTS", "multi_find=4").split(",") if "=" in pair)
+}
+
+# Workers that run command jobs and background refreshes, and how many jobs may wait for one
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, String, Text, DateTime, func, ForeignKey, Numeric
+    Column, String, Text, DateTime, func, ForeignKey, Numeric, Integer
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
@@ -68,3 +68,21 @@ class Reaction(Base):
     # Relationships
     query = relationship("Query", back_populates="reactions")
     recommended_item = relationship("RecommendedItem", back_populates="reactions")
+
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    # Each row totals one flush window's model calls for a (user, guild, command, method, model)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    discord_user_id = Column(String)  # Null for calls not made on behalf of a user
+    guild_id = Column(String)
+    command = Column(String, nullable=False)
+    method = Column(String, nullable=False)
+    model = Column(String)
+    calls = Column(Integer, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False)
+    completion_tokens = Column(Integer, nullable=False)
+    seconds = Column(Numeric, nullable=False)
+    cost_usd = Column(Numeric, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Spend reports filter on it
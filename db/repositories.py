@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
-from db.models import User, Query, RecommendedItem, Reaction
+from db.models import User, Query, RecommendedItem, Reaction, LLMUsage
 from sqlalchemy.sql import text
+from sqlalchemy import func, literal, tuple_
 import json
 import traceback
 
@@ -100,6 +101,62 @@ def get_wishlist_items_for_user(db: Session, user_id: str, limit: int = None):
         
     return wishlist_items.all()
 
+def _wishlist_item_ids(db: Session, user_id: str):
+    """Subquery of the ids of every item the user has wishlisted."""
+    return (
+        db.query(Reaction.recommended_item_id)
+        .join(Query, Query.id == Reaction.query_id)
+        .filter(Query.user_id == user_id)
+        .filter(Reaction.reaction_type == "wishlist")
+    )
+
+def count_wishlist_items_for_user(db: Session, user_id: str) -> int:
+    return (
+        db.query(func.count(RecommendedItem.id))
+        .filter(RecommendedItem.id.in_(_wishlist_item_ids(db, user_id)))
+        .scalar()
+    )
+
+def get_wishlist_page_for_user(db: Session, user_id: str, page_size: int = 10,
+                               cursor: tuple = None, backwards: bool = False):
+    """
+    Get one page of a user's wishlist, newest first, using keyset pagination.
+    
+    Args:
+        db: Database session
+        user_id: The user's ID to get wishlist items for
+        page_size: Number of items per page
+        cursor: (created_at, id) of the item to page from, or None for the first page
+        backwards: Page towards newer items (previous page) instead of older ones
+        
+    Returns:
+        (items, has_more) where has_more says whether another page exists in that direction
+    """
+    order_key = tuple_(RecommendedItem.created_at, RecommendedItem.id)
+    if cursor is not None:
+        cursor_key = tuple_(
+            literal(cursor[0], type_=RecommendedItem.created_at.type),
+            literal(cursor[1], type_=RecommendedItem.id.type)
+        )
+    query = db.query(RecommendedItem).filter(RecommendedItem.id.in_(_wishlist_item_ids(db, user_id)))
+    
+    if backwards:
+        if cursor is not None:
+            query = query.filter(order_key > cursor_key)
+        query = query.order_by(RecommendedItem.created_at.asc(), RecommendedItem.id.asc())
+    else:
+        if cursor is not None:
+            query = query.filter(order_key < cursor_key)
+        query = query.order_by(RecommendedItem.created_at.desc(), RecommendedItem.id.desc())
+    
+    # Fetch one extra row to know whether there is another page
+    items = query.limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backwards:
+        items.reverse()
+    return items, has_more
+
 def get_recent_queries_by_user(db: Session, user_id: str, limit: int = 5):
     """
     Get the most recent queries for a specific user.
@@ -173,3 +230,44 @@ def get_latest_recommendations_for_user(db: Session, user_id: str, limit: int =
         print(f"Database error in get_latest_recommendations_for_user: {e}")
         traceback.print_exc()  
         return []
+
+
+# --------------- LLM USAGE REPOSITORY ---------------
+USAGE_GROUPS = {
+    "command": LLMUsage.command,
+    "guild": LLMUsage.guild_id,
+    "user": LLMUsage.discord_user_id,
+    "method": LLMUsage.method,
+    "model": LLMUsage.model,
+}
+
+def insert_llm_usage(db: Session, rows: list):
+    """
+    Writes a batch of aggregated usage rows in a single statement.
+    """
+    if not rows:
+        return
+    db.bulk_insert_mappings(LLMUsage, rows)
+    db.commit()
+
+def get_llm_usage_summary(db: Session, since, group_by: str = "command", limit: int = 10):
+    """
+    Totals model usage since `since`, grouped by command, guild, user, method or model, costliest first.
+    """
+    column = USAGE_GROUPS[group_by]
+    cost = func.sum(LLMUsage.cost_usd)
+    return (
+        db.query(
+            column.label("key"),
+            func.sum(LLMUsage.calls).label("calls"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            func.sum(LLMUsage.seconds).label("seconds"),
+            cost.label("cost_usd"),
+        )
+        .filter(LLMUsage.created_at >= since)
+        .group_by(column)
+        .order_by(cost.desc())
+        .limit(limit)
+        .all()
+    )
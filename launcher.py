@@ -0,0 +1,150 @@
+"""
+Runs the bot as several processes, each owning a cluster of shards, and
+restarts any cluster process that exits.
+
+Usage: python launcher.py [--shard-count N] [--clusters N]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+from config import DISCORD_TOKEN
+
+# Discord allows one IDENTIFY every 5 seconds per bot
+IDENTIFY_INTERVAL = 5
+# Restart backoff, reset once a cluster has stayed up for STABLE_AFTER seconds
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+STABLE_AFTER = 300
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+
+
+def get_recommended_shard_count():
+    """Asks Discord how many shards this bot should run."""
+    response = requests.get(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {DISCORD_TOKEN}"},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()["shards"]
+
+
+def split_shards(shard_count, cluster_count):
+    """Splits shard ids into contiguous, evenly sized clusters."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    size, extra = divmod(shard_count, cluster_count)
+    clusters, start = [], 0
+    for i in range(cluster_count):
+        end = start + size + (1 if i < extra else 0)
+        clusters.append(list(range(start, end)))
+        start = end
+    return clusters
+
+
+class Cluster:
+    def __init__(self, index, shard_ids, shard_count, cluster_count):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.cluster_count = cluster_count
+        self.process = None
+        self.started_at = 0
+        self.backoff = MIN_BACKOFF
+        self.restart_at = None
+
+    def start(self):
+        env = dict(
+            os.environ,
+            SHARD_IDS=",".join(str(shard) for shard in self.shard_ids),
+            SHARD_COUNT=str(self.shard_count),
+            CLUSTER_COUNT=str(self.cluster_count),
+        )
+        if os.environ.get("METRICS_PORT"):
+            # Each cluster serves its own metrics, on consecutive ports from METRICS_PORT
+            env["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + self.index)
+        self.process = subprocess.Popen([sys.executable, BOT_SCRIPT], env=env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f"[LAUNCHER] Cluster {self.index} started (pid {self.process.pid}, shards {self.shard_ids})")
+
+    def check(self):
+        """Schedules a restart with exponential backoff once the process has exited."""
+        now = time.monotonic()
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.start()
+            return
+
+        code = self.process.poll()
+        if code is None:
+            if now - self.started_at > STABLE_AFTER:
+                self.backoff = MIN_BACKOFF
+            return
+
+        print(f"[LAUNCHER] Cluster {self.index} exited with code {code}, restarting in {self.backoff}s")
+        self.restart_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as supervised shard clusters.")
+    parser.add_argument("--shard-count", type=int, default=None,
+                        help="Total shards (defaults to Discord's recommendation)")
+    parser.add_argument("--clusters", type=int, default=os.cpu_count() or 1,
+                        help="Number of processes to spread shards over (defaults to CPU count)")
+    args = parser.parse_args()
+
+    shard_count = args.shard_count or get_recommended_shard_count()
+    shard_groups = split_shards(shard_count, args.clusters)
+    clusters = [
+        Cluster(i, shard_ids, shard_count, len(shard_groups))
+        for i, shard_ids in enumerate(shard_groups)
+    ]
+    print(f"[LAUNCHER] Running {shard_count} shards in {len(clusters)} clusters")
+
+    running = True
+
+    def shutdown(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    try:
+        # Stagger startup so clusters don't all identify at once
+        for cluster in clusters:
+            if not running:
+                break
+            cluster.start()
+            time.sleep(IDENTIFY_INTERVAL * len(cluster.shard_ids))
+
+        while running:
+            for cluster in clusters:
+                cluster.check()
+            time.sleep(1)
+    finally:
+        print("[LAUNCHER] Shutting down clusters")
+        for cluster in clusters:
+            cluster.stop()
+        for cluster in clusters:
+            if cluster.process:
+                try:
+                    cluster.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    cluster.process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,25 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 class ShoppingItem(BaseModel):
     item_name: str
 
-class Recommendation(BaseModel):
+class PurchaseSelection(BaseModel):
+    """The purchase option the model picked for one item."""
     item_name: str
     price: Optional[str] = None
     link: Optional[str] = None
     source: Optional[str] = None
 
+    @field_validator("price", mode="before")
+    @classmethod
+    def price_as_text(cls, value):
+        # Models sometimes return prices as numbers
+        return str(value) if isinstance(value, (int, float)) else value
+
+class Recommendation(PurchaseSelection):
+    thumbnail: Optional[str] = None
+
 class StructuredResponse(BaseModel):
     recommendations: List[ShoppingItem]
 
@@ -17,4 +27,15 @@ class QueryRequest(BaseModel):
     item_name: str
     type: Optional[str] = None
     price_range: Optional[str] = None
-    number_of_results: int = 3 
\ No newline at end of file
+    number_of_results: int = 3
+
+class ParsedRecommendations(QueryRequest):
+    """A parsed query and its item recommendations from a single model call."""
+    recommendations: List[ShoppingItem]
+
+class MultiItemQuery(BaseModel):
+    category: str
+    items: List[str]
+
+class WebResults(BaseModel):
+    results: List[PurchaseSelection]
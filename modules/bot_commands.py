@@ -1,22 +1,31 @@
 from discord.ext import commands
 from db.repositories import (
-    create_or_get_user, create_query, create_recommended_item, get_wishlist_items_for_user, get_latest_recommendations_for_user
+    create_or_get_user, create_query, create_recommended_item, get_latest_recommendations_for_user
 )
 from sqlalchemy.orm import Session
 import discord
-from prompted_response import PromptedResponse
-from views.recommended_item_embed import recommended_item_embed
+from prompted_response import PromptedResponse, PipelineContext
+from views.recommended_item_embed import recommended_item_embed, send_recommended_items, EmbedItem
+from views.wishlist_view import WishlistView
 from modules.user_profile import UserProfileAnalyzer
-import matplotlib.pyplot as plt
 import io
-from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime, timedelta        
-import numpy as np
+from services.render_service import RenderService
+from services.llm_cache import llm_cache
+from services.semantic_cache import semantic_cache
+from services.structured_output import structured_output_stats
+from services.tracing import tracer
+from services.llm_usage import set_usage_attribution
+from services.usage_ledger import usage_ledger
 from utils.loading_animations import LoadingAnimations
 from utils.recommendation_service import RecommendationService
+from modules.command_quotas import CommandQuotas
+from services.job_queue import JobQueue, BACKGROUND
 import asyncio
+import functools
 import traceback
 from typing import Callable
+from config import CHANNEL_BUFFER_SIZE, CHANNEL_BUFFER_MIN_MESSAGES
 
 def get_search_tips_embed():
     """Returns an embed with helpful search tips"""
@@ -48,9 +57,76 @@ def get_search_tips_embed():
     
     return embed
 
-def register_commands(bot, db_getter: Callable[[], Session]):
+async def send_code_blocks(ctx: commands.Context, text: str):
+    """Sends text as code blocks, split on line boundaries to fit Discord's 2000 character limit."""
+    chunk = []
+    for line in text.splitlines():
+        line = line[:1900]
+        if sum(len(l) + 1 for l in chunk) + len(line) > 1900:
+            await ctx.send("```\n" + "\n".join(chunk) + "\n```")
+            chunk = []
+        chunk.append(line)
+    if chunk:
+        await ctx.send("```\n" + "\n".join(chunk) + "\n```")
+
+async def delete_messages(*messages):
+    """Deletes the given status messages, skipping unsent ones and ones already gone."""
+    for message in messages:
+        if message is None:
+            continue
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+async def run_traced(command: str, ctx: commands.Context, job):
+    """Runs a command's background job inside a root span tagged with the command and guild."""
+    with tracer.span(f"command.{command}", command=command, guild_id=ctx.guild.id if ctx.guild else None):
+        await job()
+
+def register_commands(bot, db_getter: Callable[[], Session], memory_diagnostics=None, render_service=None,
+                      message_history=None, loop_watchdog=None, command_quotas=None, job_queue=None):
+    # One pipeline for every command; its OpenAI client is the shared process-wide one
+    prompted_response = PromptedResponse()
     # Initialize the recommendation service
-    recommendation_service = RecommendationService()
+    recommendation_service = RecommendationService(openai_service=prompted_response.openai_service)
+    render_service = render_service or RenderService()
+    command_quotas = command_quotas or CommandQuotas()
+    job_queue = job_queue or JobQueue()
+
+    async def admit(command: str, ctx: commands.Context):
+        """Reserves quota for an expensive command before it starts; the user is told if it is queued or rejected."""
+        return await command_quotas.admit(
+            command, ctx.author.id, ctx.guild.id if ctx.guild else None, notify=ctx.send
+        )
+
+    async def start_job(command: str, ctx: commands.Context, job, admission=None):
+        """
+        Queues a command's job on the shared worker pool, tied to the invoking
+        message so deleting it cancels the job. The admission is released once
+        the job ends; if the queue is full the user is told to try later.
+        """
+        queued = job_queue.submit(
+            command, functools.partial(run_traced, command, ctx, job),
+            message_id=ctx.message.id, on_done=admission.release if admission is not None else None
+        )
+        if queued is None:
+            await ctx.send("😓 I'm too busy to take this request right now. Please try again in a minute.")
+
+    async def refresh_recommendations(user_id):
+        """Background job: regenerates a user's recommendations on a connection of its own."""
+        db = db_getter()
+        try:
+            await recommendation_service.update_recommendations(db, user_id)
+        finally:
+            db.close()
+
+    @bot.before_invoke
+    async def attribute_usage(ctx: commands.Context):
+        # Runs in the invoking task, so model calls from the command and the jobs it starts are charged to it
+        set_usage_attribution(
+            user_id=ctx.author.id, guild_id=ctx.guild.id if ctx.guild else None, command=ctx.command.qualified_name
+        )
 
     @bot.command()
     async def hello(ctx: commands.Context):
@@ -65,8 +141,7 @@ def register_commands(bot, db_getter: Callable[[], Session]):
         """
         
         async def do_search():
-            prompted_response = PromptedResponse()
-            tips_message = None
+            status_message = tips_message = None
             
             # Get a fresh database connection
             db = db_getter()
@@ -84,61 +159,67 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                 # Send tips while searching - SAVE THE MESSAGE REFERENCE
                 tips_message = await ctx.send(embed=get_search_tips_embed())
                 
-                # Parse the query into structured data
-                parsed_query = await prompted_response.parse_query(query)
-                
-                # Log the query
-                new_query = create_query(
-                    db,
-                    user_id=user.id,
-                    query_type="prompted",
-                    raw_query=query,
-                    interpreted_query=parsed_query
-                )
-                
-                # Get product recommendations
+                # Get product recommendations; the pipeline parses the query exactly once
                 region = "us"  # Default to US region
-                recommendations = await prompted_response.run_prompted_response(query, region)
+                pipeline = PipelineContext(raw_query=query)
+                recommendations = await prompted_response.run_prompted_response(query, region, context=pipeline)
+                
+                # Log the query with the parsed form the pipeline used
+                with tracer.span("db.write", table="queries"):
+                    new_query = create_query(
+                        db,
+                        user_id=user.id,
+                        query_type="prompted",
+                        raw_query=query,
+                        interpreted_query=pipeline.parsed_query
+                    )
                 
                 # Remove the tips message now that we have results
                 if tips_message:
                     await tips_message.delete()
                 
                 if recommendations:
+                    embed_items = []
                     for shopping_item in recommendations:
                         # Store recommendation in database
                         rec_link = shopping_item.link if shopping_item.link is not None else ""
                         rec_price = float(shopping_item.price.replace('$', '').replace(",", "")) if shopping_item.price is not None else 0.0
                         
-                        rec_item = create_recommended_item(
-                            db,
-                            query_id=new_query.id,
-                            item_name=shopping_item.item_name,
-                            vendor="Unknown" if shopping_item.source is None else shopping_item.source,
-                            link=rec_link,
-                            price=rec_price,
-                            metadata=shopping_item.model_dump()
-                        )
+                        with tracer.span("db.write", table="recommended_items"):
+                            rec_item = create_recommended_item(
+                                db,
+                                query_id=new_query.id,
+                                item_name=shopping_item.item_name,
+                                vendor="Unknown" if shopping_item.source is None else shopping_item.source,
+                                link=rec_link,
+                                price=rec_price,
+                                metadata=shopping_item.model_dump()
+                            )
                         
-                        await recommended_item_embed(
-                            ctx, 
-                            None, 
-                            shopping_item.item_name, 
-                            shopping_item.price, 
+                        embed_items.append(EmbedItem(
+                            shopping_item.item_name,
+                            shopping_item.price,
                             rec_link,
                             query_id=new_query.id,
-                            rec_item_id=rec_item.id
-                        )
+                            rec_item_id=rec_item.id,
+                            image_url=shopping_item.thumbnail
+                        ))
+                    
+                    # Send all items together instead of one message per item
+                    await send_recommended_items(ctx, embed_items)
                 else:
                     await ctx.send("No recommendations found.")
                     
                 await status_message.delete()  # Remove the status message once done
                 
-                # Get a fresh connection for the background task
-                bg_db = db_getter()
-                # Trigger the background recommendation service (pass the new connection)
-                asyncio.create_task(recommendation_service.update_recommendations(bg_db, user.id))
+                # Refresh recommendations once interactive jobs have had their turn
+                job_queue.submit("recommendation_refresh", functools.partial(refresh_recommendations, user.id),
+                                 priority=BACKGROUND)
                 
+            except asyncio.CancelledError:
+                # The command message was deleted; don't leave its loading messages behind
+                await delete_messages(status_message, tips_message)
+                raise
             except Exception as e:
                 print(f"Error in search: {e}")
                 traceback.print_exc()
@@ -149,7 +230,10 @@ def register_commands(bot, db_getter: Callable[[], Session]):
             finally:
                 db.close()  # Always close the connection
         
-        bot.loop.create_task(do_search())
+        admission = await admit("find", ctx)
+        if admission is None:
+            return
+        await start_job("find", ctx, do_search, admission)
 
     @bot.command()
     async def multi_find(ctx: commands.Context, *, query: str):
@@ -158,8 +242,7 @@ def register_commands(bot, db_getter: Callable[[], Session]):
         Example: !multi_find ski equipment
         """
         async def do_multi_search():
-            prompted_response = PromptedResponse()
-            tips_message = None
+            status_message = tips_message = None
             try:
                 # Log or retrieve the user
                 db = db_getter()
@@ -176,13 +259,14 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                 interpreted_set = await prompted_response.parse_multi_item_query(query)
                 
                 # Log the query in database
-                new_query = create_query(
-                    db,
-                    user_id=user.id,
-                    query_type="prompted",
-                    raw_query=query,
-                    interpreted_query=interpreted_set
-                )
+                with tracer.span("db.write", table="queries"):
+                    new_query = create_query(
+                        db,
+                        user_id=user.id,
+                        query_type="prompted",
+                        raw_query=query,
+                        interpreted_query=interpreted_set
+                    )
                 
                 region = "us"
                 
@@ -218,15 +302,16 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                         rec_link = shopping_item.link if shopping_item.link is not None else ""
                         rec_price = float(shopping_item.price.replace('$', '').replace(",", "")) if shopping_item.price is not None else 0.0
                         
-                        rec_item = create_recommended_item(
-                            db,
-                            query_id=new_query.id,
-                            item_name=shopping_item.item_name,
-                            vendor="Unknown" if shopping_item.source is None else shopping_item.source,
-                            link=rec_link,
-                            price=rec_price,
-                            metadata=shopping_item.model_dump()
-                        )
+                        with tracer.span("db.write", table="recommended_items"):
+                            rec_item = create_recommended_item(
+                                db,
+                                query_id=new_query.id,
+                                item_name=shopping_item.item_name,
+                                vendor="Unknown" if shopping_item.source is None else shopping_item.source,
+                                link=rec_link,
+                                price=rec_price,
+                                metadata=shopping_item.model_dump()
+                            )
                         
                         return {
                             "ctx": ctx,
@@ -248,22 +333,26 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                     await tips_message.delete()
                 
                 # Process results and display embeds
-                for result in [r for r in results if r]:
-                    await recommended_item_embed(
-                        result["ctx"],
-                        None,
+                await send_recommended_items(ctx, [
+                    EmbedItem(
                         result["shopping_item"].item_name,
                         result["shopping_item"].price,
                         result["rec_link"],
                         query_id=result["query_id"],
-                        rec_item_id=result["rec_item_id"]
+                        rec_item_id=result["rec_item_id"],
+                        image_url=result["shopping_item"].thumbnail
                     )
+                    for result in results if result
+                ])
                 
-                # Get a fresh connection for the background task
-                bg_db = db_getter()
-                # Trigger the background recommendation service (pass the new connection)
-                asyncio.create_task(recommendation_service.update_recommendations(bg_db, user.id))
+                # Refresh recommendations once interactive jobs have had their turn
+                job_queue.submit("recommendation_refresh", functools.partial(refresh_recommendations, user.id),
+                                 priority=BACKGROUND)
                 
+            except asyncio.CancelledError:
+                # The command message was deleted; don't leave its loading messages behind
+                await delete_messages(status_message, tips_message)
+                raise
             except Exception as e:
                 print(f"Error in multi-search: {e}")
                 traceback.print_exc()
@@ -273,7 +362,10 @@ def register_commands(bot, db_getter: Callable[[], Session]):
             finally:
                 db.close()
         
-        bot.loop.create_task(do_multi_search())
+        admission = await admit("multi_find", ctx)
+        if admission is None:
+            return
+        await start_job("multi_find", ctx, do_multi_search, admission)
 
     @bot.command()
     async def wishlist(ctx: commands.Context):
@@ -288,33 +380,20 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                 db = db_getter()
                 user = create_or_get_user(db, discord_id=str(ctx.author.id), username=ctx.author.name)
                 
-                # Get all wishlist items for the user
-                wishlist_items = get_wishlist_items_for_user(db, user.id)
-                
-                if not wishlist_items:
+                # Show the wishlist one page at a time in a single message
+                view = WishlistView(db_getter, user.id, owner_id=ctx.author.id)
+                if not view.load_first_page():
                     await ctx.send("Your wishlist is empty. Add items using the ❤️ button on product recommendations!")
                     return
-                    
-                await ctx.send(f"**Your Wishlist** ({len(wishlist_items)} items)")
                 
-                for item in wishlist_items:
-                    # Create item embeds for each wishlist item
-                    await recommended_item_embed(
-                        ctx,
-                        None,
-                        item.item_name,
-                        str(item.price),
-                        item.link,
-                        query_id=item.query_id,
-                        rec_item_id=item.id
-                    )
+                view.message = await ctx.send(embed=view.build_embed(), view=view)
                     
             finally:
                 db.close()
         
         # Only process in DMs or when invoked in a server
         if isinstance(ctx.channel, discord.DMChannel) or not hasattr(ctx, 'guild'):
-            bot.loop.create_task(get_wishlist())
+            await start_job("wishlist", ctx, get_wishlist)
         else:
             await ctx.send("For privacy, please DM me with `!wishlist` to see your saved items.")
 
@@ -326,19 +405,29 @@ def register_commands(bot, db_getter: Callable[[], Session]):
         """
         
         async def lucky_search():
-            from modules.message_history import MessageHistory
-            prompted_response = PromptedResponse()
-            
+            status_message = None
             try:
                 # Get the user
                 db = db_getter()
                 user = create_or_get_user(db, discord_id=str(ctx.author.id), username=ctx.author.name)
                 
-                # Get recent message history from the channel
-                message_texts = []
-                async for msg in ctx.channel.history(limit=50):
-                    if not msg.author.bot:
-                        message_texts.append(msg.content)
+                # Read recent chat from the local buffer; only cold channels fetch history from Discord
+                message_texts = None
+                if message_history is not None:
+                    message_texts = message_history.get_buffered_messages(
+                        ctx.channel.id, min_messages=CHANNEL_BUFFER_MIN_MESSAGES
+                    )
+                if message_texts is None:
+                    message_texts = []
+                    with tracer.span("channel_history.fetch"):
+                        async for msg in ctx.channel.history(limit=CHANNEL_BUFFER_SIZE):
+                            if not msg.author.bot and msg.content:
+                                message_texts.append(msg.content)
+                    message_texts.reverse()  # history() is newest first
+                    if message_history is not None:
+                        message_history.seed_buffer(
+                            ctx.channel.id, message_texts, shard_id=ctx.guild.shard_id if ctx.guild else None
+                        )
                 
                 # If there's not enough context, use a generic approach
                 if len(message_texts) < 3:
@@ -352,16 +441,18 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                 status_message = await ctx.send(embed=loading_embed)
                 
                 # Use OpenAI to analyze the conversation and suggest a surprising item
-                surprise_item = await prompted_response.generate_surprise_recommendation(message_texts)
+                with tracer.span("generate_surprise_recommendation", messages=len(message_texts)):
+                    surprise_item = await prompted_response.generate_surprise_recommendation(message_texts)
                 
                 # Log the query
-                new_query = create_query(
-                    db,
-                    user_id=user.id,
-                    query_type="unprompted",
-                    raw_query="Generated from chat context",
-                    interpreted_query={"surprise_item": surprise_item}
-                )
+                with tracer.span("db.write", table="queries"):
+                    new_query = create_query(
+                        db,
+                        user_id=user.id,
+                        query_type="unprompted",
+                        raw_query="Generated from chat context",
+                        interpreted_query={"surprise_item": surprise_item}
+                    )
                 
                 # Get recommendation for the surprise item
                 region = "us"
@@ -379,15 +470,16 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                     rec_link = shopping_item.link if shopping_item.link is not None else ""
                     rec_price = float(shopping_item.price.replace('$', '').replace(",", "")) if shopping_item.price is not None else 0.0
                     
-                    rec_item = create_recommended_item(
-                        db,
-                        query_id=new_query.id,
-                        item_name=shopping_item.item_name,
-                        vendor="Unknown" if shopping_item.source is None else shopping_item.source,
-                        link=rec_link,
-                        price=rec_price,
-                        metadata=shopping_item.model_dump()
-                    )
+                    with tracer.span("db.write", table="recommended_items"):
+                        rec_item = create_recommended_item(
+                            db,
+                            query_id=new_query.id,
+                            item_name=shopping_item.item_name,
+                            vendor="Unknown" if shopping_item.source is None else shopping_item.source,
+                            link=rec_link,
+                            price=rec_price,
+                            metadata=shopping_item.model_dump()
+                        )
                     
                     await ctx.send(f"✨ **Based on the chat, you might be interested in:** {surprise_item}")
                     
@@ -398,15 +490,23 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                         shopping_item.price, 
                         rec_link,
                         query_id=new_query.id,
-                        rec_item_id=rec_item.id
+                        rec_item_id=rec_item.id,
+                        image_url=shopping_item.thumbnail
                     )
                 else:
                     await ctx.send(f"I thought you might like **{surprise_item}**, but couldn't find any good recommendations.")
                     
+            except asyncio.CancelledError:
+                # The command message was deleted; don't leave its loading message behind
+                await delete_messages(status_message)
+                raise
             finally:
                 db.close()
         
-        bot.loop.create_task(lucky_search())
+        admission = await admit("feeling_lucky", ctx)
+        if admission is None:
+            return
+        await start_job("feeling_lucky", ctx, lucky_search, admission)
 
     @bot.command(name="wrapped")
     async def wrapped(ctx: commands.Context):
@@ -422,6 +522,10 @@ def register_commands(bot, db_getter: Callable[[], Session]):
         )
         status_message = await ctx.send(embed=loading_embed)
         
+        admission = await admit("wrapped", ctx)
+        if admission is None:
+            await status_message.delete()
+            return
         try:
             # Get the user
             db = db_getter()
@@ -439,37 +543,19 @@ def register_commands(bot, db_getter: Callable[[], Session]):
                 return
             
             # Generate profile analysis using LLM
-            prompted_response = PromptedResponse()
             profile_insights = await prompted_response.generate_user_profile(user_history)
             
             # Create visual representation of shopping interests
-            # Create a pie chart of product categories
+            # Render the pie chart and personality image in a worker so the event loop stays free
             if profile_insights['category_breakdown']:
-                plt.figure(figsize=(8, 5))
-                categories = list(profile_insights['category_breakdown'].keys())
-                values = list(profile_insights['category_breakdown'].values())
-                
-                # Color palette
-                colors = plt.cm.Pastel1(np.linspace(0, 1, len(categories)))
-                
-                plt.pie(values, labels=categories, autopct='%1.1f%%', startangle=140, colors=colors)
-                plt.axis('equal')
-                plt.title('Your Shopping Interests')
-                
-                # Save the pie chart to a bytes buffer
-                buf = io.BytesIO()
-                plt.savefig(buf, format='png')
-                buf.seek(0)
-                
-                # Create file object for discord attachment
-                chart_file = discord.File(buf, filename="shopping_profile.png")
+                chart_png, personality_png = await render_service.render_wrapped(
+                    profile_insights['category_breakdown'],
+                    profile_insights['shopping_personality']
+                )
                 
-                # Prepare shopping personality image
-                personality_img = profile_analyzer.generate_personality_image(profile_insights['shopping_personality'])
-                personality_buf = io.BytesIO()
-                personality_img.save(personality_buf, format='PNG')
-                personality_buf.seek(0)
-                personality_file = discord.File(personality_buf, filename="personality.png")
+                # Create file objects for discord attachment
+                chart_file = discord.File(io.BytesIO(chart_png), filename="shopping_profile.png")
+                personality_file = discord.File(io.BytesIO(personality_png), filename="personality.png")
                 
                 # Create embed with insights
                 embed = discord.Embed(
@@ -539,6 +625,8 @@ def register_commands(bot, db_getter: Callable[[], Session]):
             print(f"Error in profile command: {str(e)}")
             await status_message.delete()
             await ctx.send(f"Sorry, I encountered an error while analyzing your profile: {str(e)}")
+        finally:
+            admission.release()
 
     @bot.command()
     async def all_commands(ctx: commands.Context):
@@ -562,8 +650,8 @@ def register_commands(bot, db_getter: Callable[[], Session]):
             
             # Add each command to the embed with improved formatting
             for command in command_list:
-                # Skip the help command itself to avoid recursion
-                if command.name == "help":
+                # Skip the help command itself to avoid recursion, and owner-only tools
+                if command.name == "help" or command.hidden:
                     continue
                 
                 # Extract the first line of the docstring as a short description
@@ -671,4 +759,69 @@ def register_commands(bot, db_getter: Callable[[], Session]):
             print(f"Error retrieving recommendations: {e}")
             traceback.print_exc()
             await status_message.delete()
-            await ctx.send("Sorry, I encountered an error while retrieving your recommendations.")
\ No newline at end of file
+            await ctx.send("Sorry, I encountered an error while retrieving your recommendations.")
+
+    @bot.command(name="memory", hidden=True)
+    @commands.is_owner()
+    async def memory(ctx: commands.Context, action: str = None):
+        """
+        Owner only: reports memory usage and the largest allocation growth.
+        Use `!memory snapshot` to take a fresh tracemalloc diff first.
+        """
+        if memory_diagnostics is None:
+            await ctx.send("Memory diagnostics are not available.")
+            return
+
+        if action == "snapshot":
+            if not memory_diagnostics.enabled:
+                await ctx.send("tracemalloc is off. Restart with `MEMORY_PROFILING=1` to take snapshots.")
+                return
+            await asyncio.to_thread(memory_diagnostics.take_diff)
+
+        report = await asyncio.to_thread(memory_diagnostics.report)
+        await send_code_blocks(ctx, report)
+
+    @bot.command(name="cache_stats", hidden=True)
+    @commands.is_owner()
+    async def cache_stats(ctx: commands.Context):
+        """
+        Owner only: shows model response cache hit rates and savings, and how often
+        structured model calls needed retries or failed.
+        """
+        report = f"{llm_cache.report()}\n{semantic_cache.report()}\n\n{structured_output_stats.report()}"
+        await ctx.send("```\n" + report[:1900] + "\n```")
+
+    @bot.command(name="loop_stalls", hidden=True)
+    @commands.is_owner()
+    async def loop_stalls(ctx: commands.Context, count: int = 3):
+        """
+        Owner only: shows the most recent event loop stalls caught by the watchdog.
+        """
+        if loop_watchdog is None or not loop_watchdog.enabled:
+            await ctx.send("The loop watchdog is off. Restart with `LOOP_WATCHDOG=1` to enable it.")
+            return
+        if not loop_watchdog.recent:
+            await ctx.send("No event loop stalls detected.")
+            return
+
+        reports = list(loop_watchdog.recent)[-count:]
+        await send_code_blocks(ctx, "\n\n".join(
+            f"{datetime.fromtimestamp(at):%H:%M:%S} {text}" for at, text in reports
+        ))
+
+    @bot.command(name="usage", hidden=True)
+    @commands.is_owner()
+    async def usage(ctx: commands.Context, days: int = 7, group_by: str = "command"):
+        """
+        Owner only: shows estimated model spend, tokens and time per call.
+        Group by command, guild, user, method or model, e.g. `!usage 30 guild`.
+        """
+        await send_code_blocks(ctx, await usage_ledger.report(days=days, group_by=group_by))
+
+    @bot.command(name="jobs", hidden=True)
+    @commands.is_owner()
+    async def jobs(ctx: commands.Context):
+        """
+        Owner only: shows busy workers, queued jobs per priority and recent queue waits.
+        """
+        await send_code_blocks(ctx, f"{job_queue.report()}\nQuotas: {command_quotas.report()}")
@@ -0,0 +1,159 @@
+import asyncio
+import collections
+from time import time
+
+from modules.cooldown_manager import InMemoryBucketBackend, RateLimit
+from services.metrics import registry
+
+QUOTA_REJECTIONS = registry.counter(
+    "pricepal_quota_rejections_total", "Expensive commands turned away by a quota", ["command", "reason"]
+)
+QUOTA_QUEUED = registry.counter("pricepal_quota_queued_total", "Expensive commands that waited for capacity", ["command"])
+
+
+class Admission:
+    """Capacity held by one admitted command until release() is called."""
+
+    def __init__(self, quotas, user_id, cost):
+        self.quotas = quotas
+        self.user_id = user_id
+        self.cost = cost
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.quotas._release(self.user_id, self.cost)
+
+
+class CommandQuotas:
+    """
+    Admission control for commands that start upstream work, checked before
+    any of that work begins:
+
+    - each user may have `user_concurrency` commands running at once
+    - each guild (or DM user) may spend `guild_per_minute` units a minute
+    - at most `global_in_flight` units run at once; later commands wait in a
+      FIFO queue of up to `max_queue` for `queue_timeout` seconds
+
+    A command costs `costs[command]` units (default 1), so e.g. !multi_find
+    counts as the four pipelines it runs. Any limit set to 0 is off. Guilds
+    always live on one shard, so their buckets stay in process; user and
+    global limits are per process.
+    """
+
+    def __init__(self, user_concurrency=1, guild_per_minute=20, global_in_flight=20, max_queue=50,
+                 queue_timeout=60.0, costs=None):
+        self.user_concurrency = user_concurrency
+        self.guild_limit = RateLimit(capacity=guild_per_minute, period=60) if guild_per_minute else None
+        self.global_in_flight = global_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.costs = costs or {}
+        self.guild_buckets = InMemoryBucketBackend()
+        self.user_jobs = collections.Counter()
+        self.in_flight = 0
+        self.waiters = collections.deque()  # (future, cost) in arrival order
+
+    @property
+    def queued(self):
+        return sum(1 for future, _ in self.waiters if not future.done())
+
+    def cost(self, command):
+        cost = self.costs.get(command, 1)
+        return min(cost, self.global_in_flight) if self.global_in_flight else cost
+
+    def _guild_retry_after(self, key, cost, now):
+        level = self.guild_buckets._refill(key, self.guild_limit, now)
+        return max(1, round((cost - level) * self.guild_limit.period / self.guild_limit.capacity))
+
+    async def admit(self, command, user_id, guild_id=None, notify=None):
+        """
+        Reserves capacity for `command`. Returns an Admission to release once
+        the command's work is done, or None if it was rejected. `notify` is
+        awaited with a message for the user when the command is queued or rejected.
+        """
+        async def tell(text):
+            if notify is not None:
+                await notify(text)
+
+        cost = self.cost(command)
+        guild_key = None  # Set once the guild has paid, so a later rejection can refund it
+        if self.user_concurrency and self.user_jobs[user_id] >= self.user_concurrency:
+            QUOTA_REJECTIONS.inc(command=command, reason="user_concurrency")
+            await tell("⏳ You already have a request running. Please wait for it to finish first.")
+            return None
+
+        if self.guild_limit is not None:
+            key = ("guild", guild_id) if guild_id is not None else ("dm", user_id)
+            now = time()
+            if not self.guild_buckets.acquire([(key, self.guild_limit)], now, cost=min(cost, self.guild_limit.capacity)):
+                QUOTA_REJECTIONS.inc(command=command, reason="guild_rate")
+                await tell(f"🚦 This server is sending a lot of requests right now. "
+                           f"Please try again in {self._guild_retry_after(key, cost, now)}s.")
+                return None
+            guild_key = key
+
+        # Reserve the user's slot before waiting so a queued user can't queue a second command
+        self.user_jobs[user_id] += 1
+        if not self.global_in_flight:
+            return Admission(self, user_id, 0)
+        if not self.queued and self.in_flight + cost <= self.global_in_flight:
+            self.in_flight += cost
+            return Admission(self, user_id, cost)
+
+        if self.queued >= self.max_queue:
+            self._release(user_id, 0)
+            self._refund_guild(guild_key, cost)
+            QUOTA_REJECTIONS.inc(command=command, reason="queue_full")
+            await tell("😓 I'm too busy to take this request right now. Please try again in a minute.")
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((future, cost))
+        QUOTA_QUEUED.inc(command=command)
+        try:
+            await tell(f"🕒 Lots of requests right now, you're number {self.queued} in line. "
+                       f"I'll start as soon as I can.")
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except BaseException as e:
+            # A future that completed was admitted just as the wait ended, so its units are held too
+            admitted = future.done() and not future.cancelled()
+            future.cancel()
+            self._release(user_id, cost if admitted else 0)
+            self._refund_guild(guild_key, cost)
+            if not isinstance(e, asyncio.TimeoutError):
+                raise
+            QUOTA_REJECTIONS.inc(command=command, reason="queue_timeout")
+            await tell("😓 Sorry, I couldn't get to your request in time. Please try again.")
+            return None
+        return Admission(self, user_id, cost)
+
+    def _refund_guild(self, key, cost):
+        """Gives back the guild tokens of a command that was turned away before it ran."""
+        if key is not None:
+            self.guild_buckets.refund([(key, self.guild_limit)], min(cost, self.guild_limit.capacity))
+
+    def _release(self, user_id, cost):
+        self.user_jobs[user_id] -= 1
+        if self.user_jobs[user_id] <= 0:
+            del self.user_jobs[user_id]
+        self.in_flight -= cost
+        self._wake()
+
+    def _wake(self):
+        """Admits queued commands in order while the head of the queue fits."""
+        while self.waiters:
+            future, cost = self.waiters[0]
+            if future.done():
+                self.waiters.popleft()
+                continue
+            if self.in_flight + cost > self.global_in_flight:
+                break
+            self.waiters.popleft()
+            self.in_flight += cost
+            future.set_result(True)
+
+    def report(self) -> str:
+        return (f"{self.in_flight}/{self.global_in_flight or '∞'} units in flight, {self.queued} queued, "
+                f"{len(self.user_jobs)} users with running commands")
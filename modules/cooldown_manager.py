@@ -1,21 +1,187 @@
+from collections import OrderedDict, namedtuple
 from time import time
 
+from config import RATE_LIMIT_REDIS_URL, RATE_LIMIT_REDIS_TIMEOUT
+
+# A budget of `capacity` calls that refills at `capacity / period` tokens per second
+RateLimit = namedtuple("RateLimit", ["capacity", "period"])
+
+# Scopes are checked in this order; a call is allowed only if every scope has budget
+SCOPES = ("channel", "user", "guild", "global")
+
+DEFAULT_LIMITS = {
+    "user": RateLimit(capacity=3, period=60),
+    "guild": RateLimit(capacity=10, period=60),
+    "global": RateLimit(capacity=60, period=60),
+}
+
+
+class InMemoryBucketBackend:
+    """
+    Token buckets kept in a single process.
+
+    Buckets live in an OrderedDict ordered by last use, so idle keys can be
+    evicted from the front in O(1) per key. A bucket that has been idle for a
+    full refill period is indistinguishable from a new one and is dropped.
+    """
+
+    def __init__(self):
+        self.buckets = OrderedDict()  # key -> [tokens, updated_at, idle_ttl]
+
+    def _refill(self, key, limit, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return float(limit.capacity)
+        rate = limit.capacity / limit.period
+        return min(limit.capacity, bucket[0] + (now - bucket[1]) * rate)
+
+    def acquire(self, keyed_limits, now, cost=1):
+        """Consumes `cost` tokens from every bucket, or none if any is short."""
+        self.evict(now)
+
+        levels = [self._refill(key, limit, now) for key, limit in keyed_limits]
+        if any(level < cost for level in levels):
+            return False
+
+        for (key, limit), level in zip(keyed_limits, levels):
+            self.buckets[key] = [level - cost, now, limit.period]
+            self.buckets.move_to_end(key)
+        return True
+
+    def refund(self, keyed_limits, cost=1):
+        """Gives back `cost` tokens taken by acquire() for work that never ran."""
+        for key, limit in keyed_limits:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(limit.capacity, bucket[0] + cost)
+
+    def evict(self, now):
+        """Drops buckets that have been idle long enough to be full again."""
+        while self.buckets:
+            key, (_, updated_at, idle_ttl) = next(iter(self.buckets.items()))
+            if now - updated_at < idle_ttl:
+                break
+            self.buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+class RedisBucketBackend:
+    """
+    Token buckets shared between bot processes through Redis.
+
+    The check-and-consume runs as a single Lua script so concurrent processes
+    cannot overdraw a bucket. Keys expire on their own once idle for a full
+    refill period. The client is asyncio-native with short socket timeouts,
+    so a slow or unreachable Redis never blocks the gateway loop for long.
+    """
+
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local cost = tonumber(ARGV[2])
+    local levels = {}
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[1 + i * 2])
+        local period = tonumber(ARGV[2 + i * 2])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = capacity
+        if state[1] then
+            local elapsed = math.max(0, now - tonumber(state[2]))
+            tokens = math.min(capacity, tonumber(state[1]) + elapsed * capacity / period)
+        end
+        if tokens < cost then
+            return 0
+        end
+        levels[i] = tokens
+    end
+    for i, key in ipairs(KEYS) do
+        local period = tonumber(ARGV[2 + i * 2])
+        redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil(period * 1000))
+    end
+    return 1
+    """
+
+    def __init__(self, url, prefix="pricepal:ratelimit:", timeout=0.25):
+        import redis.asyncio as redis  # Optional dependency, only needed for a shared backend
+
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.prefix = prefix
+        self.script = self.client.register_script(self.ACQUIRE_SCRIPT)
+
+    async def acquire(self, keyed_limits, now, cost=1):
+        keys = [self.prefix + ":".join(str(part) for part in key) for key, _ in keyed_limits]
+        args = [now, cost]
+        for _, limit in keyed_limits:
+            args.extend([limit.capacity, limit.period])
+        return bool(await self.script(keys=keys, args=args))
+
+    def evict(self, now):
+        """Redis expires idle keys itself."""
+
+
 class CooldownManager:
-    def __init__(self, cooldown_seconds=30):
-        self.channel_last_called = {}
+    def __init__(self, cooldown_seconds=30, limits=None, backend=None, cluster_count=1):
         self.cooldown_seconds = cooldown_seconds
         self.last_searched_query = {}
-    
-    def should_call_llm(self, channel_id):
-        """Returns True if enough time has passed since last LLM call for this channel."""
+
+        # The channel budget keeps the original one-call-per-window behaviour
+        self.limits = {"channel": RateLimit(capacity=1, period=cooldown_seconds)}
+        self.limits.update(DEFAULT_LIMITS if limits is None else limits)
+
+        self.fallback_backend = InMemoryBucketBackend()
+        self.backend = backend or self._default_backend()
+        self.backend_retry_at = 0.0  # After a backend error, local buckets are used until then
+
+        # Channels and guilds always live on one shard, but users and the global
+        # budget span every cluster. Without a shared backend each process only
+        # gets its share of those budgets, so a user active on every cluster
+        # still gets their budget once (a user on fewer clusters gets less).
+        if cluster_count > 1 and self.backend is self.fallback_backend:
+            for scope in ("user", "global"):
+                if scope in self.limits:
+                    capacity, period = self.limits[scope]
+                    self.limits[scope] = RateLimit(max(1, capacity // cluster_count), period)
+
+    def _default_backend(self):
+        if not RATE_LIMIT_REDIS_URL:
+            return self.fallback_backend
+        try:
+            return RedisBucketBackend(RATE_LIMIT_REDIS_URL, timeout=RATE_LIMIT_REDIS_TIMEOUT)
+        except Exception as e:
+            print(f"Rate limiter falling back to in-memory buckets: {e}")
+            return self.fallback_backend
+
+    def _keyed_limits(self, channel_id, user_id=None, guild_id=None):
+        ids = {"channel": channel_id, "user": user_id, "guild": guild_id, "global": "all"}
+        return [
+            ((scope, ids[scope]), self.limits[scope])
+            for scope in SCOPES
+            if scope in self.limits and ids[scope] is not None
+        ]
+
+    async def try_acquire(self, channel_id, user_id=None, guild_id=None, cost=1):
+        """
+        Returns True and consumes budget if every applicable scope
+        (channel, user, guild, global) has `cost` tokens available.
+        """
+        keyed_limits = self._keyed_limits(channel_id, user_id, guild_id)
         now = time()
-        if channel_id in self.channel_last_called:
-            last_called = self.channel_last_called[channel_id]
-            if now - last_called < self.cooldown_seconds:
-                return False
-        self.channel_last_called[channel_id] = now
-        return True
-    
+        if self.backend is self.fallback_backend or now < self.backend_retry_at:
+            return self.fallback_backend.acquire(keyed_limits, now, cost)
+        try:
+            return await self.backend.acquire(keyed_limits, now, cost)
+        except Exception as e:
+            # Don't pay a timeout on every message while the shared backend is down
+            self.backend_retry_at = now + 30
+            print(f"Rate limiter backend error, using local buckets for 30s: {e}")
+            return self.fallback_backend.acquire(keyed_limits, now, cost)
+
+    async def should_call_llm(self, channel_id, user_id=None, guild_id=None):
+        """Returns True if the channel, user, guild and global budgets allow another LLM call."""
+        return await self.try_acquire(channel_id, user_id=user_id, guild_id=guild_id)
+
     # def is_duplicate_query(self, channel_id, query):
     #     """Check if this is the same query as the last one for this channel."""
     #     is_duplicate = self.last_searched_query.get(channel_id) == query
@@ -0,0 +1,120 @@
+import asyncio
+import gc
+import resource
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict
+
+
+class MemoryDiagnostics:
+    """
+    Opt-in memory profiling for the running bot.
+
+    When enabled, tracemalloc is started and a snapshot is taken every
+    `interval` seconds; the top-N allocation sites that grew since the previous
+    snapshot are kept for the `!memory` command. Object counts of long-lived
+    structures are available whether or not tracemalloc is running.
+    """
+
+    def __init__(self, enabled=False, interval=300, top_n=10, frames=1):
+        self.enabled = enabled
+        self.interval = interval
+        self.top_n = top_n
+        self.frames = frames
+        self.trackers: Dict[str, Callable[[], int]] = {}
+        self.instance_types = {}
+        self.previous_snapshot = None
+        self.last_diff = []
+        self.last_snapshot_at = None
+        self.task = None
+
+    def start(self, loop):
+        """Starts tracemalloc and the periodic snapshot task if profiling is enabled."""
+        if not self.enabled or self.task is not None:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.previous_snapshot = self._take_snapshot()
+        self.last_snapshot_at = datetime.now()
+        self.task = loop.create_task(self._snapshot_loop())
+        print(f"Memory profiling enabled, snapshots every {self.interval}s")
+
+    def track(self, name: str, counter: Callable[[], int]):
+        """Registers a callable reporting the size of a long-lived structure."""
+        self.trackers[name] = counter
+
+    def track_instances(self, name: str, cls: type):
+        """Registers a class whose live instances are counted on demand."""
+        self.instance_types[name] = cls
+
+    def _take_snapshot(self):
+        snapshot = tracemalloc.take_snapshot()
+        # Ignore the profiler's own bookkeeping
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def take_diff(self):
+        """Snapshots now and stores the top-N growth since the previous snapshot."""
+        snapshot = self._take_snapshot()
+        if self.previous_snapshot is None:
+            self.previous_snapshot = snapshot
+            return []
+        self.last_diff = snapshot.compare_to(self.previous_snapshot, "lineno")[:self.top_n]
+        self.previous_snapshot = snapshot
+        self.last_snapshot_at = datetime.now()
+        return self.last_diff
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Snapshotting walks every traced block, so keep it off the event loop
+                diff = await asyncio.to_thread(self.take_diff)
+                if diff:
+                    print(f"[MEMORY] Top growth since last snapshot: {diff[0]}")
+            except Exception as e:
+                print(f"Memory snapshot error: {e}")
+
+    def object_counts(self):
+        """Returns the current size of every tracked structure."""
+        counts = {}
+        for name, counter in self.trackers.items():
+            try:
+                counts[name] = counter()
+            except Exception as e:
+                counts[name] = f"error: {e}"
+
+        if self.instance_types:
+            # Walking the heap is slow, but this only runs when someone asks for a report
+            instances = dict.fromkeys(self.instance_types, 0)
+            for obj in gc.get_objects():
+                for name, cls in self.instance_types.items():
+                    if isinstance(obj, cls):
+                        instances[name] += 1
+            counts.update(instances)
+        return counts
+
+    def report(self):
+        """Formats a plain-text report of memory usage."""
+        # ru_maxrss is reported in KiB on Linux
+        lines = [f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"]
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"Traced: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)")
+        else:
+            lines.append("tracemalloc is off (set MEMORY_PROFILING=1 or pass --memory-profile)")
+
+        lines.append("")
+        lines.append("Long-lived objects:")
+        for name, count in self.object_counts().items():
+            lines.append(f"  {name}: {count}")
+
+        if self.last_diff:
+            lines.append("")
+            lines.append(f"Top {len(self.last_diff)} allocation growth as of {self.last_snapshot_at:%H:%M:%S}:")
+            for stat in self.last_diff:
+                lines.append(f"  {stat}")
+        return "\n".join(lines)
@@ -1,17 +1,83 @@
+from collections import OrderedDict, deque
+
+
 class MessageHistory:
-    def __init__(self, max_context=1):
+    def __init__(self, max_context=1, buffer_size=50, buffer_max_channels=5000):
         self.recent_messages = {}
         self.max_context = max_context
-    
-    def add_message(self, channel_id, message_content):
+
+        # Every channel with history, least recently active first, mapped to its shard (or None).
+        # Past buffer_max_channels the oldest channel's context and buffer are dropped together.
+        self.channels = OrderedDict()
+
+        # Longer rolling buffer of human messages per channel
+        self.buffer_size = buffer_size
+        self.buffer_max_channels = buffer_max_channels
+        self.channel_buffers = {}
+        # Channels whose buffer was seeded from the API: their whole recent history, however short
+        self.seeded = set()
+
+    def _touch(self, channel_id, shard_id=None):
+        if channel_id in self.channels:
+            self.channels.move_to_end(channel_id)
+            if shard_id is not None:
+                self.channels[channel_id] = shard_id
+            return
+        self.channels[channel_id] = shard_id
+        while len(self.channels) > self.buffer_max_channels:
+            evicted, _ = self.channels.popitem(last=False)
+            self.recent_messages.pop(evicted, None)
+            self.channel_buffers.pop(evicted, None)
+            self.seeded.discard(evicted)
+
+    def add_message(self, channel_id, message_content, shard_id=None, from_bot=False):
         """Add a message to the history for a channel."""
-        if channel_id not in self.recent_messages:  
-            self.recent_messages[channel_id] = []
-            
-        self.recent_messages[channel_id].append(message_content)
-        if len(self.recent_messages[channel_id]) > self.max_context:
-            self.recent_messages[channel_id].pop(0)
-    
+        self._touch(channel_id, shard_id)
+        context = self.recent_messages.setdefault(channel_id, [])
+        context.append(message_content)
+        if len(context) > self.max_context:
+            context.pop(0)
+
+        if not from_bot and message_content:
+            self._buffer(channel_id).append(message_content)
+
+    def _buffer(self, channel_id):
+        buffer = self.channel_buffers.get(channel_id)
+        if buffer is None:
+            buffer = self.channel_buffers[channel_id] = deque(maxlen=self.buffer_size)
+        return buffer
+
     def get_context(self, channel_id):
         """Get the message history for a channel."""
-        return self.recent_messages.get(channel_id, []) 
\ No newline at end of file
+        return self.recent_messages.get(channel_id, [])
+
+    def get_buffered_messages(self, channel_id, min_messages=1):
+        """
+        Returns the channel's buffered messages, oldest first, or None if fewer
+        than `min_messages` have been seen since the bot started (a cold channel).
+        A seeded channel is warm however few messages it has, since the seed
+        already held everything the API had.
+        """
+        buffer = self.channel_buffers.get(channel_id)
+        if buffer is None or (len(buffer) < min_messages and channel_id not in self.seeded):
+            return None
+        return list(buffer)
+
+    def seed_buffer(self, channel_id, messages, shard_id=None):
+        """Replaces a cold channel's buffer with history fetched from the API (oldest first)."""
+        self._touch(channel_id, shard_id)
+        self.seeded.add(channel_id)
+        buffer = self._buffer(channel_id)
+        buffer.clear()
+        buffer.extend(messages)
+
+    def drop_shard(self, shard_id):
+        """
+        Forget the history of every channel served by a shard, e.g. after it
+        re-identifies and may have missed messages in between.
+        """
+        for channel_id in [channel_id for channel_id, shard in self.channels.items() if shard == shard_id]:
+            del self.channels[channel_id]
+            self.recent_messages.pop(channel_id, None)
+            self.channel_buffers.pop(channel_id, None)
+            self.seeded.discard(channel_id)
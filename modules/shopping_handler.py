@@ -1,12 +1,15 @@
 from utils.interpret_chat import interpret_chat
-from prompted_response import PromptedResponse
+from prompted_response import PromptedResponse, PipelineContext
 from utils.shopping_keywords import is_potential_shopping_message
-from views.recommended_item_embed import recommended_item_embed
+from views.recommended_item_embed import send_recommended_items, EmbedItem
 from sqlalchemy.orm import Session
 from db.repositories import (
     create_or_get_user, create_query, create_recommended_item
 )
 from utils.loading_animations import LoadingAnimations
+from services.tracing import tracer
+from services.llm_usage import usage_attribution
+from services.metrics import KEYWORD_GATE
 from typing import List, Callable
 import discord
 
@@ -17,18 +20,33 @@ class ShoppingHandler:
 
     async def process_message(self, message: discord.Message, context: List[str], cooldown_manager):
         """Process a message for shopping intent."""
-    
-        if not is_potential_shopping_message(message.content):
+        guild_id = message.guild.id if message.guild else None
+        with tracer.span("chat_message", command="chat", guild_id=guild_id), \
+                usage_attribution(user_id=message.author.id, guild_id=guild_id, command="chat"):
+            await self._process_message(message, context, cooldown_manager)
+
+    async def _process_message(self, message: discord.Message, context: List[str], cooldown_manager):
+        with tracer.span("keyword_gate") as span:
+            is_candidate = is_potential_shopping_message(message.content)
+            span.set_attribute("passed", is_candidate)
+        KEYWORD_GATE.inc(result="pass" if is_candidate else "fail")
+        if not is_candidate:
             print("Not a potential shopping message.")
             return
             
         channel_id = message.channel.id
+        guild_id = message.guild.id if message.guild else None
         
-        if not cooldown_manager.should_call_llm(channel_id):
+        with tracer.span("cooldown_gate") as span:
+            allowed = await cooldown_manager.should_call_llm(channel_id, user_id=message.author.id, guild_id=guild_id)
+            span.set_attribute("passed", allowed)
+        if not allowed:
             print("Not enough time has passed since last LLM call.")
             return
             
-        query = await interpret_chat(context)
+        with tracer.span("interpret_chat", messages=len(context)) as span:
+            query = await interpret_chat(context)
+            span.set_attribute("found_item", bool(query.get("item")))
         
         if not query.get("item"):
             print("No item in query.")
@@ -45,6 +63,13 @@ class ShoppingHandler:
         db = self.get_db()
         unprompted_query = None
         rec_item = None
+        # interpret_chat has already parsed the request, so the pipeline doesn't parse it again
+        pipeline = PipelineContext(raw_query=message.content, parsed_query={
+            "item_name": query["item"],
+            "type": query.get("type"),
+            "price_range": query.get("price_range"),
+            "number_of_results": query.get("number_of_results") or 3,
+        })
         
         try:
             # Create or get user record
@@ -54,19 +79,21 @@ class ShoppingHandler:
                 username=message.author.name
             )
             
-            # Create query record
-            interpreted = await self.prompted_response.parse_query(message.content)
-            print(f"Interpreted: {interpreted}")
-            unprompted_query = create_query(
-                db,
-                user_id=user.id,
-                query_type="unprompted",
-                raw_query=message.content,
-                interpreted_query=interpreted
-            )
-            
             # Get recommendations
-            recommendations = await self.prompted_response.run_prompted_response(interpreted, region)
+            recommendations = await self.prompted_response.run_prompted_response(
+                message.content, region, context=pipeline
+            )
+            print(f"Interpreted: {pipeline.parsed_query}")
+
+            # Create query record
+            with tracer.span("db.write", table="queries"):
+                unprompted_query = create_query(
+                    db,
+                    user_id=user.id,
+                    query_type="unprompted",
+                    raw_query=message.content,
+                    interpreted_query=pipeline.parsed_query
+                )
             print("--------------------------------")
             print(f"Recommendations: {recommendations}")
             print("--------------------------------")
@@ -74,35 +101,39 @@ class ShoppingHandler:
             await status_message.delete()
             
             if recommendations:
+                embed_items = []
                 for shopping_item in recommendations:
                     try:
                         # Clean price string and convert to float
                         price_str = shopping_item.price if shopping_item.price is not None else "0.0"
                         price_str = price_str.replace('$', '').replace(',', '')  # Remove $ and commas
                         rec_price = float(price_str)
-                        
-                        rec_item = create_recommended_item(
-                            db,
-                            query_id=unprompted_query.id,
-                            item_name=shopping_item.item_name,
-                            vendor="Unknown" if shopping_item.source is None else shopping_item.source,
-                            link=shopping_item.link if shopping_item.link is not None else "",
-                            price=rec_price,
-                            metadata=shopping_item.model_dump()
-                        )
+                    
+                        with tracer.span("db.write", table="recommended_items"):
+                            rec_item = create_recommended_item(
+                                db,
+                                query_id=unprompted_query.id,
+                                item_name=shopping_item.item_name,
+                                vendor="Unknown" if shopping_item.source is None else shopping_item.source,
+                                link=shopping_item.link if shopping_item.link is not None else "",
+                                price=rec_price,
+                                metadata=shopping_item.model_dump()
+                            )
 
-                        await recommended_item_embed(
-                            None, 
-                            message,
+                        embed_items.append(EmbedItem(
                             shopping_item.item_name,
                             shopping_item.price,
                             shopping_item.link if shopping_item.link else "",
                             query_id=unprompted_query.id,
-                            rec_item_id=rec_item.id
-                        )
+                            rec_item_id=rec_item.id,
+                            image_url=shopping_item.thumbnail
+                        ))
                     except Exception as e:
                         print(f"Error processing recommendation: {e}")
                         continue  # Skip this item and continue with others
+            
+                # Send all items together instead of one message per item
+                await send_recommended_items(message.channel, embed_items)
             else:
                 await message.channel.send("No recommendations found.")
         except Exception as e:
@@ -114,20 +145,25 @@ class ShoppingHandler:
             except:
                 pass
                 
-            # Still try to show recommendations without DB
+            # Still try to show recommendations without DB, reusing whatever the pipeline already finished
             try:
-                recommendations = await self.prompted_response.run_prompted_response(query, region)
+                recommendations = pipeline.recommendations
+                if recommendations is None:
+                    recommendations = await self.prompted_response.run_prompted_response(
+                        message.content, region, context=pipeline
+                    )
                 if recommendations and unprompted_query and unprompted_query.id:
-                    for shopping_item in recommendations:
-                        await recommended_item_embed(
-                            None, 
-                            message, 
+                    await send_recommended_items(message.channel, [
+                        EmbedItem(
                             shopping_item.item_name, 
                             shopping_item.price, 
                             shopping_item.link,
                             query_id=unprompted_query.id,
-                            rec_item_id=rec_item.id if rec_item else None
+                            rec_item_id=rec_item.id if rec_item else None,
+                            image_url=shopping_item.thumbnail
                         )
+                        for shopping_item in recommendations
+                    ])
                 else:
                     await message.channel.send("No recommendations found.")
             except Exception as inner_e:
@@ -2,10 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from db.models import User, Query, RecommendedItem, Reaction
-from PIL import Image, ImageDraw, ImageFont
-import random
-import numpy as np
-import io
+from services.render_service import draw_personality_image
 
 class UserProfileAnalyzer:
     def __init__(self, db: Session):
@@ -75,49 +72,4 @@ class UserProfileAnalyzer:
         """
         Creates a visual representation of the user's shopping personality
         """
-        # Create a base image (500x200)
-        img = Image.new('RGBA', (500, 200), (255, 255, 255, 0))
-        draw = ImageDraw.Draw(img)
-        
-        # Define personality types and their colors
-        personality_colors = {
-            "Bargain Hunter": (76, 175, 80),     # Green
-            "Luxury Seeker": (156, 39, 176),     # Purple
-            "Practical Buyer": (3, 169, 244),    # Blue
-            "Trendsetter": (255, 87, 34),        # Orange
-            "Tech Enthusiast": (33, 150, 243),   # Light Blue
-            "Fashion Forward": (233, 30, 99),    # Pink
-            "Minimalist": (158, 158, 158),       # Gray
-            "Impulse Shopper": (255, 193, 7),    # Amber
-            "Research Master": (63, 81, 181),    # Indigo
-            "Casual Browser": (139, 195, 74)     # Light Green
-        }
-        
-        # Default color if personality not found
-        personality_type = personality_data.get('type', 'Casual Browser')
-        color = personality_colors.get(personality_type, (100, 100, 100))
-        
-        # Draw personality blob (abstract representation)
-        center_x, center_y = 250, 100
-        
-        # Draw dots representing traits with randomness for visual interest
-        traits = personality_data.get('traits', [])
-        for i, trait in enumerate(traits[:5]):  # Limit to 5 traits
-            angle = (i / 5) * 2 * np.pi
-            distance = random.randint(50, 80)
-            x = center_x + int(np.cos(angle) * distance)
-            y = center_y + int(np.sin(angle) * distance)
-            
-            # Draw connecting line
-            draw.line((center_x, center_y, x, y), fill=color, width=2)
-            
-            # Draw circle at trait point
-            circle_size = 20
-            draw.ellipse((x-circle_size/2, y-circle_size/2, x+circle_size/2, y+circle_size/2), 
-                         fill=color, outline=(0, 0, 0))
-        
-        # Draw central personality circle
-        draw.ellipse((center_x-40, center_y-40, center_x+40, center_y+40), 
-                     fill=color, outline=(0, 0, 0, 128))
-        
-        return img
+        return draw_personality_image(personality_data)
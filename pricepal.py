@@ -0,0 +1,194 @@
+import sys
+import discord
+from discord.ext import commands
+
+# Import modular components
+from modules.cooldown_manager import CooldownManager
+from modules.command_quotas import CommandQuotas
+from modules.message_history import MessageHistory
+from modules.shopping_handler import ShoppingHandler
+from modules.bot_commands import register_commands
+from modules.memory_diagnostics import MemoryDiagnostics
+from views.shopping_item_view import ShoppingItemView, ReactionButton
+from config import (
+    DISCORD_TOKEN, AUTO_SHARD, SHARD_COUNT, SHARD_IDS, CLUSTER_COUNT, WARM_UP_IMPORTS,
+    MEMORY_PROFILING, MEMORY_SNAPSHOT_INTERVAL, MEMORY_TOP_N, RENDER_WORKERS, RENDER_USE_PROCESSES,
+    CHANNEL_BUFFER_SIZE, CHANNEL_BUFFER_MAX_CHANNELS, METRICS_PORT, METRICS_HOST, METRICS_LOOP_LAG_INTERVAL,
+    LOOP_WATCHDOG, LOOP_WATCHDOG_THRESHOLD, LOOP_WATCHDOG_ASYNCIO_DEBUG, QUOTA_USER_CONCURRENCY,
+    QUOTA_GUILD_PER_MINUTE, QUOTA_GLOBAL_IN_FLIGHT, QUOTA_MAX_QUEUE, QUOTA_QUEUE_TIMEOUT, QUOTA_COMMAND_COSTS,
+    JOB_WORKERS, JOB_QUEUE_MAX
+)
+from db.database import get_db_session, engine
+from services.render_service import RenderService
+from services.metrics import registry as metrics_registry, MetricsServer, MESSAGES_SEEN
+from services.loop_watchdog import LoopWatchdog
+from services.job_queue import JobQueue
+from services.llm_cache import llm_cache
+from services.semantic_cache import semantic_cache
+from services.structured_output import structured_output_stats
+from services.usage_ledger import usage_ledger
+from services.preview_image_service import preview_image_resolver
+from services.openai_client import close_openai_clients
+
+# Memory tracking is off by default since tracemalloc slows down every allocation
+memory_diagnostics = MemoryDiagnostics(
+    enabled=MEMORY_PROFILING or "--memory-profile" in sys.argv,
+    interval=MEMORY_SNAPSHOT_INTERVAL,
+    top_n=MEMORY_TOP_N
+)
+
+# Reports code that blocks the event loop; meant for staging since asyncio debug mode adds overhead
+loop_watchdog = LoopWatchdog(
+    enabled=LOOP_WATCHDOG or "--loop-watchdog" in sys.argv,
+    threshold=LOOP_WATCHDOG_THRESHOLD,
+    asyncio_debug=LOOP_WATCHDOG_ASYNCIO_DEBUG
+)
+
+class ClosesServices:
+    """Shuts the bot's services down inside its event loop once the gateway is closed."""
+
+    async def close(self):
+        if self.is_closed():
+            return
+        await super().close()
+        # Cancel jobs first so nothing records usage or opens connections after this
+        for name, shutdown in (("job queue", job_queue.stop), ("usage ledger", usage_ledger.stop),
+                               ("preview images", preview_image_resolver.close),
+                               ("OpenAI clients", close_openai_clients)):
+            try:
+                await shutdown()
+            except Exception as e:
+                print(f"Error closing {name}: {e}")
+
+
+class PricePalBot(ClosesServices, commands.Bot):
+    pass
+
+
+class ShardedPricePalBot(ClosesServices, commands.AutoShardedBot):
+    pass
+
+
+# Bot setup
+intents = discord.Intents.default()
+intents.message_content = True
+if SHARD_IDS is not None:
+    # Run one cluster of shards, as started by launcher.py
+    bot = ShardedPricePalBot(command_prefix="!", intents=intents, shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
+elif AUTO_SHARD or SHARD_COUNT:
+    # Run every shard in this process
+    bot = ShardedPricePalBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT)
+else:
+    bot = PricePalBot(command_prefix="!", intents=intents)
+
+# Initialize components
+cooldown_manager = CooldownManager(cooldown_seconds=30, cluster_count=CLUSTER_COUNT)
+message_history = MessageHistory(
+    max_context=5, buffer_size=CHANNEL_BUFFER_SIZE, buffer_max_channels=CHANNEL_BUFFER_MAX_CHANNELS
+)
+shopping_handler = ShoppingHandler(get_db_session)
+command_quotas = CommandQuotas(
+    user_concurrency=QUOTA_USER_CONCURRENCY, guild_per_minute=QUOTA_GUILD_PER_MINUTE,
+    global_in_flight=QUOTA_GLOBAL_IN_FLIGHT, max_queue=QUOTA_MAX_QUEUE, queue_timeout=QUOTA_QUEUE_TIMEOUT,
+    costs=QUOTA_COMMAND_COSTS
+)
+job_queue = JobQueue(workers=JOB_WORKERS, max_pending=JOB_QUEUE_MAX)
+render_service = RenderService(max_workers=RENDER_WORKERS, use_processes=RENDER_USE_PROCESSES)
+
+memory_diagnostics.track("message_history.channels", lambda: len(message_history.recent_messages))
+memory_diagnostics.track("message_history.messages", lambda: sum(len(m) for m in message_history.recent_messages.values()))
+memory_diagnostics.track("message_history.buffered", lambda: sum(len(b) for b in message_history.channel_buffers.values()))
+memory_diagnostics.track("cooldown_manager.buckets", lambda: len(cooldown_manager.fallback_backend))
+memory_diagnostics.track_instances("ShoppingItemView instances", ShoppingItemView)
+
+def cache_request_counts():
+    counts = {}
+    for method, stats in list(llm_cache.stats.items()):
+        counts[("llm", method, "hit")] = stats["hits"]
+        counts[("llm", method, "miss")] = stats["misses"]
+    counts[("semantic", "run_prompted_response", "hit")] = semantic_cache.hits
+    counts[("semantic", "run_prompted_response", "miss")] = semantic_cache.misses
+    return counts
+
+metrics_server = MetricsServer(metrics_registry, host=METRICS_HOST, port=METRICS_PORT, lag_interval=METRICS_LOOP_LAG_INTERVAL)
+metrics_registry.callback("pricepal_db_pool_checked_out", "Database connections currently checked out",
+                          lambda: engine.pool.checkedout())
+metrics_registry.callback("pricepal_db_pool_size", "Database connections held by the pool",
+                          lambda: engine.pool.size())
+metrics_registry.callback("pricepal_cache_requests_total", "Cache lookups by cache, method and result",
+                          cache_request_counts, type="counter", labelnames=("cache", "method", "result"))
+metrics_registry.callback("pricepal_structured_output_failures_total", "Structured model calls that failed every attempt",
+                          lambda: {(method,): stats["failed"] for method, stats in list(structured_output_stats.stats.items())},
+                          type="counter", labelnames=("method",))
+metrics_registry.callback("pricepal_quota_in_flight", "Quota units held by running expensive commands",
+                          lambda: command_quotas.in_flight)
+metrics_registry.callback("pricepal_quota_queued", "Expensive commands waiting for quota",
+                          lambda: command_quotas.queued)
+metrics_registry.callback("pricepal_job_queue_depth", "Jobs waiting for a worker by priority",
+                          lambda: {(priority,): count for priority, count in job_queue.depth().items()},
+                          labelnames=("priority",))
+metrics_registry.callback("pricepal_jobs_running", "Jobs currently running on a worker",
+                          lambda: len(job_queue.running))
+metrics_registry.callback("pricepal_history_channels", "Channels with buffered chat history",
+                          lambda: len(message_history.channel_buffers))
+
+@bot.event
+async def on_ready():
+    print(f"We have logged in as {bot.user}")
+    if WARM_UP_IMPORTS:
+        bot.loop.create_task(render_service.warm_up())
+    memory_diagnostics.start(bot.loop)
+    usage_ledger.start(bot.loop, get_db_session)
+    loop_watchdog.start(bot.loop)
+    # Last, since it binds a port and is the likeliest to fail
+    metrics_server.start(bot.loop)
+
+@bot.event
+async def on_shard_ready(shard_id):
+    # A fresh session may have missed messages, so start those channels' context over
+    message_history.drop_shard(shard_id)
+    print(f"Shard {shard_id} ready")
+
+@bot.event
+async def on_raw_message_delete(payload):
+    # A deleted command message no longer needs its answer, so drop its job whether queued or running
+    job_queue.cancel_for_message(payload.message_id)
+
+@bot.event
+async def on_message(message):
+    # Ignore messages from the bot itself
+    if message.author == bot.user:
+        return
+    MESSAGES_SEEN.inc()
+
+    channel_id = message.channel.id
+    shard_id = message.guild.shard_id if message.guild else None
+
+    # Track message history
+    message_history.add_message(channel_id, message.content, shard_id=shard_id, from_bot=message.author.bot)
+
+    # Process shopping intents
+    await shopping_handler.process_message(
+        message,
+        message_history.get_context(channel_id),
+        cooldown_manager
+    )
+
+    # Process commands
+    await bot.process_commands(message)
+
+# Route every wishlist/dislike click through one handler that decodes the ids from the button
+bot.add_dynamic_items(ReactionButton)
+
+# Register all bot commands
+register_commands(bot, get_db_session, memory_diagnostics=memory_diagnostics, render_service=render_service,
+                  message_history=message_history, loop_watchdog=loop_watchdog, command_quotas=command_quotas,
+                  job_queue=job_queue)
+
+def main():
+    """Runs the bot until it is stopped; bot.py calls this."""
+    try:
+        # Closing the bot also stops the job queue, writes pending usage and closes pooled connections
+        bot.run(DISCORD_TOKEN)
+    finally:
+        render_service.shutdown()
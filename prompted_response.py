@@ -1,17 +1,38 @@
-from typing import List, Union, Dict
+from dataclasses import dataclass, field
+from typing import List, Union, Dict, Optional
 from dotenv import load_dotenv
 from services.openai_service import OpenAIService
 from services.search_service import SearchService
+from services.semantic_cache import semantic_cache as default_semantic_cache
+from services.tracing import tracer
 from models.shopping_models import ShoppingItem, Recommendation
-from config import OPENAI_MODEL, OPENAI_API_KEY, SERP_API_KEY
+from config import OPENAI_MODEL, OPENAI_API_KEY, SERP_API_KEY, PIPELINE_MODE
 
 load_dotenv()
 
+
+@dataclass
+class PipelineContext:
+    """
+    Intermediate results of one run of the recommendation pipeline, so callers
+    can reuse them (for logging, storage or a retry) instead of recomputing.
+    """
+    raw_query: Optional[str] = None
+    region: Optional[str] = None
+    parsed_query: Optional[Dict] = None
+    candidates: Optional[List[ShoppingItem]] = None
+    search_results: Dict[str, List[Dict]] = field(default_factory=dict)
+    recommendations: Optional[List[Recommendation]] = None
+    from_cache: bool = False
+
+
 class PromptedResponse:
-    def __init__(self, openai_service=None, search_service=None):
+    def __init__(self, openai_service=None, search_service=None, semantic_cache=None, pipeline_mode=None):
         # Dependency injection for better testability
         self.openai_service = openai_service or OpenAIService(api_key=OPENAI_API_KEY)
         self.search_service = search_service or SearchService(api_key=SERP_API_KEY)
+        self.semantic_cache = semantic_cache or default_semantic_cache
+        self.pipeline_mode = pipeline_mode or PIPELINE_MODE
        
     async def parse_query(self, query_str: str) -> Dict:
         """
@@ -49,31 +70,88 @@ class PromptedResponse:
         """
         return await self.openai_service.process_web_results(items, purchase_options)
 
-    async def run_prompted_response(self, query: Union[str, Dict], region: str) -> List[Recommendation]:
+    async def run_prompted_response(self, query: Union[str, Dict], region: str,
+                                    context: Optional[PipelineContext] = None) -> List[Recommendation]:
         """
         Main workflow method that orchestrates the entire recommendation process.
+
+        `query` may be raw text or an already parsed query dict. Pass a
+        PipelineContext to collect the intermediate results; stages whose
+        output the context already holds are skipped, so each runs at most once.
         """
-        # Step 1: Parse query if it's a string
+        with tracer.span("pipeline", region=region) as span:
+            results = await self._run_pipeline(query, region, context or PipelineContext())
+            span.set_attribute("results", len(results))
+            return results
+
+    async def _run_pipeline(self, query, region, context: PipelineContext) -> List[Recommendation]:
+        context.region = region
         if isinstance(query, str):
-            query_dict = await self.parse_query(query)
-        else:
-            query_dict = query
+            context.raw_query = context.raw_query or query
+        elif context.parsed_query is None:
+            context.parsed_query = query
+
+        # Steps 1 and 2 in one model call when the merged pipeline is enabled
+        if context.parsed_query is None and self.pipeline_mode == "merged":
+            with tracer.span("parse_and_recommend"):
+                merged = await self.openai_service.parse_and_recommend(context.raw_query)
+            if merged is not None:
+                context.candidates = merged.recommendations
+                context.parsed_query = merged.model_dump(exclude={"recommendations"})
+
+        # Step 1: Parse the query if we only have text
+        if context.parsed_query is None:
+            with tracer.span("parse_query"):
+                context.parsed_query = await self.parse_query(context.raw_query)
+        query_dict = context.parsed_query
+
+        # Near-duplicate queries from the same region and price bucket reuse recent results
+        with tracer.span("semantic_cache.lookup") as span:
+            cached = self.semantic_cache.get(query_dict, region)
+            span.set_attribute("hit", cached is not None)
+        if cached is not None:
+            context.recommendations = cached
+            context.from_cache = True
+            return cached
 
         # Step 2: Get recommended items
-        recommendations = await self.get_recommendations(query_dict)
+        if context.candidates is None:
+            with tracer.span("get_recommendations") as span:
+                context.candidates = await self.get_recommendations(query_dict)
+                span.set_attribute("items", len(context.candidates))
         
         # Step 3: Search for purchase options for each recommendation
+        for item in context.candidates:
+            if item.item_name not in context.search_results:
+                with tracer.span("search_shopping", item=item.item_name) as span:
+                    context.search_results[item.item_name] = self.search_service.search_shopping_results(
+                        item_name=item.item_name,
+                        region=region,
+                        price_range=query_dict.get("price_range")
+                    )
+                    span.set_attribute("results", len(context.search_results[item.item_name]))
+
         purchase_options = {}
-        for item in recommendations:
-            # options = ""
-            options = self.search_service.search_shopping(
-                item_name=item.item_name,
-                region=region,
-                price_range=query_dict.get("price_range")
-            )
+        thumbnails = {}
+        for item in context.candidates:
+            results = context.search_results[item.item_name]
+            for result in results:
+                if result.get("thumbnail"):
+                    thumbnails.setdefault(self.search_service.result_link(result), result["thumbnail"])
+                    thumbnails.setdefault(result.get("title"), result["thumbnail"])
 
-            purchase_options[item.item_name] = options
+            purchase_options[item.item_name] = self.search_service.format_results(results)
 
         # Step 4: Process results to select the best options
-        final_results = await self.process_web_results(recommendations, purchase_options)
+        with tracer.span("process_web_results", items=len(context.candidates)) as span:
+            final_results = await self.process_web_results(context.candidates, purchase_options)
+            span.set_attribute("results", len(final_results))
+
+        # Step 5: Carry the search thumbnails over so embeds don't need to scrape the product page
+        for rec in final_results:
+            if not rec.thumbnail:
+                rec.thumbnail = thumbnails.get(rec.link) or thumbnails.get(rec.item_name)
+
+        context.recommendations = final_results
+        self.semantic_cache.set(query_dict, region, final_results)
         return final_results
@@ -0,0 +1,291 @@
+"""
+Replays chat traffic through the bot's real on_message handler across many
+simulated channels: MessageHistory.add_message, the shopping keyword gate,
+CooldownManager and ShoppingHandler, then bot.process_commands. Model and
+search calls go to the local fakes in fake_services, the database is
+in-memory, and Discord channels are fakes.
+
+Reports the sustained messages/sec, per-message handling time, how much
+process memory and the bot's per-channel state grew, and the fraction of
+messages that passed the keyword gate and were escalated to a model call.
+
+The corpus is synthetic unless --corpus is given: a text file with one
+message per line, or JSON lines with "content" and optionally "channel".
+Commands (lines starting with "!") are skipped; offline_benchmark.py covers
+them.
+
+Usage: python scripts/chat_load_test.py [--messages 50000] [--channels 2000] [--rate 0]
+       [--shopping-ratio 0.05] [--corpus chat.txt]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_services import FakeChannel, FakeDatabase, FakeMessage, FakeModelServer, FakeSerpServer, fake_guild, fake_user
+from offline_benchmark import bot_output
+from pipeline_benchmark import percentile
+
+CASUAL = [
+    "lol that was wild", "anyone up for a game tonight?", "gg everyone", "brb getting food",
+    "did you see the new episode?", "that patch notes thread is something else", "good morning",
+    "I can't believe it's already friday", "who's streaming later?", "this song slaps",
+    "my cat just knocked over my water again", "ok that's fair", "haha yeah", "wait what happened",
+    "meeting ran long again", "the weather is terrible today", "nice one", "see you all tomorrow",
+]
+SHOPPING = [
+    "I'm looking to buy {item}, any suggestions?", "what's the best {item} under ${price}?",
+    "anyone know where to get a cheap {item}?", "thinking of ordering a {item} this week",
+    "is there a good deal on {item} right now?", "need a new {item}, budget is around ${price}",
+]
+ITEMS = [
+    "mechanical keyboard", "gaming mouse", "standing desk", "espresso machine", "running shoes",
+    "4k monitor", "noise cancelling headphones", "air fryer", "camping tent", "office chair",
+]
+
+
+def synthetic_corpus(count, shopping_ratio, rng):
+    for _ in range(count):
+        if rng.random() < shopping_ratio:
+            yield None, rng.choice(SHOPPING).format(item=rng.choice(ITEMS), price=rng.choice((50, 100, 200, 500)))
+        else:
+            yield None, rng.choice(CASUAL)
+
+
+def recorded_corpus(path, count):
+    """Yields (channel key or None, content), looping over the file until `count` messages."""
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    messages = []
+    for line in lines:
+        if line.startswith("{"):
+            record = json.loads(line)
+            messages.append((record.get("channel"), record.get("content", "")))
+        else:
+            messages.append((None, line))
+    messages = [(channel, content) for channel, content in messages if content and not content.startswith("!")]
+    if not messages:
+        raise SystemExit(f"No chat messages in {path}")
+    for i in range(count):
+        yield messages[i % len(messages)]
+
+
+def rss_mb():
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Channels:
+    """Simulated channels spread over guilds and shards, each with a few regular posters."""
+
+    def __init__(self, count, guilds, shards, authors_per_channel, api_latency, rng):
+        self.rng = rng
+        guild_list = [fake_guild(shard_id=i % shards) for i in range(guilds)]
+        self.channels = [FakeChannel(guild_list[i % guilds], api_latency=api_latency) for i in range(count)]
+        self.authors = [[fake_user() for _ in range(authors_per_channel)] for _ in range(count)]
+        self.by_key = {}
+
+    def pick(self, key=None):
+        if key is None:
+            index = self.rng.randrange(len(self.channels))
+        else:
+            index = self.by_key.setdefault(key, len(self.by_key) % len(self.channels))
+        return self.channels[index], self.rng.choice(self.authors[index])
+
+
+def state_sizes(bot_module):
+    history = bot_module.message_history
+    return {
+        "history_channels": len(history.recent_messages),
+        "buffered_channels": len(history.channel_buffers),
+        "buffered_messages": sum(len(b) for b in history.channel_buffers.values()),
+        "cooldown_buckets": len(bot_module.cooldown_manager.fallback_backend),
+    }
+
+
+async def replay(args, bot_module, corpus, channels):
+    from services.metrics import KEYWORD_GATE
+
+    # Count escalations at the cooldown gate, which is the last check before interpret_chat
+    cooldown_manager = bot_module.cooldown_manager
+    should_call_llm = cooldown_manager.should_call_llm
+    escalated = 0
+
+    async def counting_should_call_llm(*a, **kw):
+        nonlocal escalated
+        allowed = await should_call_llm(*a, **kw)
+        escalated += int(allowed)
+        return allowed
+
+    cooldown_manager.should_call_llm = counting_should_call_llm
+    gate_before = dict(KEYWORD_GATE.values)
+
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    timings, pending = [], set()
+    processed = failed = 0
+
+    async def handle(message):
+        nonlocal processed, failed
+        start = time.perf_counter()
+        try:
+            await bot_module.on_message(message)
+        except Exception as e:
+            failed += 1
+            print(f"on_message failed: {type(e).__name__}: {e}", file=sys.__stderr__)
+        finally:
+            timings.append(time.perf_counter() - start)
+            processed += 1
+            in_flight.release()
+
+    async def report_progress():
+        last = (time.perf_counter(), 0)
+        while True:
+            await asyncio.sleep(args.report_interval)
+            now = time.perf_counter()
+            rate = (processed - last[1]) / (now - last[0])
+            last = (now, processed)
+            print(f"  {processed:>8} messages  {rate:>9.0f} msg/s  {rss_mb():>7.1f} MB  "
+                  f"{len(pending):>5} in flight  {escalated:>5} escalated", file=sys.__stdout__)
+
+    loop = asyncio.get_running_loop()
+    reporter = loop.create_task(report_progress())
+    start = loop.time()
+    for i, (channel_key, content) in enumerate(corpus):
+        if args.rate:
+            delay = start + i / args.rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await in_flight.acquire()
+        channel, author = channels.pick(channel_key)
+        # discord.py dispatches every gateway event as its own task
+        task = loop.create_task(handle(FakeMessage(channel, content, author=author)))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(set(pending))
+    elapsed = loop.time() - start
+    reporter.cancel()
+
+    gate = {key[0][1]: count - gate_before.get(key, 0) for key, count in KEYWORD_GATE.values.items()}
+    return {
+        "messages": processed,
+        "failed": failed,
+        "seconds": elapsed,
+        "messages_per_second": processed / elapsed,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "keyword_gate_passed": gate.get("pass", 0) / processed,
+        "escalated": escalated / processed,
+    }
+
+
+async def run(args, model_server):
+    import pricepal as bot_module
+    import modules.shopping_handler
+    from services.openai_client import close_openai_clients
+    from types import SimpleNamespace
+
+    database = FakeDatabase()
+    database.install(modules.shopping_handler)
+    bot_module.shopping_handler.get_db = database.session
+    # process_commands compares authors with the logged-in user, which is unset without a gateway connection
+    bot_module.bot._connection.user = SimpleNamespace(id=0, name="PricePal", bot=True)
+
+    rng = random.Random(args.seed)
+    channels = Channels(args.channels, args.guilds, args.shards, args.authors, args.discord_latency, rng)
+    if args.corpus:
+        corpus = recorded_corpus(args.corpus, args.messages)
+    else:
+        corpus = synthetic_corpus(args.messages, args.shopping_ratio, rng)
+
+    gc.collect()
+    memory_before, sizes_before = rss_mb(), state_sizes(bot_module)
+    quiet = open(os.devnull, "w")
+    try:
+        with bot_output(quiet):
+            results = await replay(args, bot_module, corpus, channels)
+            # Let replies that were still being sent finish
+            background = asyncio.all_tasks() - {asyncio.current_task()}
+            if background:
+                await asyncio.wait(background, timeout=60)
+    finally:
+        quiet.close()
+        await close_openai_clients()
+    gc.collect()
+
+    results["rss_mb_before"] = memory_before
+    results["rss_mb_after"] = rss_mb()
+    results["model_calls"] = model_server.calls
+    results["state_before"] = sizes_before
+    results["state_after"] = state_sizes(bot_module)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000, help="messages to replay")
+    parser.add_argument("--channels", type=int, default=2000, help="simulated channels")
+    parser.add_argument("--guilds", type=int, default=200, help="guilds the channels are spread across")
+    parser.add_argument("--shards", type=int, default=4, help="shards the guilds are spread across")
+    parser.add_argument("--authors", type=int, default=5, help="regular posters per channel")
+    parser.add_argument("--rate", type=float, default=0, help="target messages/sec (0 replays as fast as possible)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="on_message calls allowed to run at once")
+    parser.add_argument("--shopping-ratio", type=float, default=0.05, help="share of synthetic messages about buying")
+    parser.add_argument("--corpus", help="recorded chat to replay instead of the synthetic corpus")
+    parser.add_argument("--model-latency", type=float, default=0.6, help="seconds per stubbed model call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per stubbed shopping search")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per Discord API call")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic corpus")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    model_server = FakeModelServer(latency=args.model_latency, seconds_per_token=0).start()
+    serp_server = FakeSerpServer(latency=args.search_latency).start()
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": model_server.base_url,
+        "SERP_API_KEY": "benchmark",
+        "SERPAPI_BASE_URL": serp_server.base_url,
+        "PREVIEW_IMAGE_SCRAPING": "0",
+    })
+    for name in ("RATE_LIMIT_REDIS_URL", "METRICS_PORT", "SHARD_IDS", "SHARD_COUNT", "AUTO_SHARD"):
+        os.environ.pop(name, None)
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+
+    print(f"Replaying {args.messages} messages across {args.channels} channels")
+    try:
+        results = asyncio.run(run(args, model_server))
+    finally:
+        model_server.stop()
+        serp_server.stop()
+
+    print(f"Sustained:   {results['messages_per_second']:.0f} msg/s "
+          f"({results['messages']} messages in {results['seconds']:.1f}s, {results['failed']} failed)")
+    print(f"Handling:    p50 {results['p50_ms']:.2f}ms, p99 {results['p99_ms']:.2f}ms per message")
+    print(f"Escalation:  {results['keyword_gate_passed'] * 100:.2f}% passed the keyword gate, "
+          f"{results['escalated'] * 100:.2f}% escalated to a model call ({results['model_calls']} model calls)")
+    print(f"Memory:      {results['rss_mb_before']:.1f} MB -> {results['rss_mb_after']:.1f} MB RSS")
+    for key, after in results["state_after"].items():
+        print(f"  {key:<20}{results['state_before'][key]:>8} -> {after}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Local stand-ins for the bot's external services so it can be benchmarked offline.
+
+- FakeModelServer speaks just enough of the chat completions API for
+  AsyncOpenAI. Point the client at it with OPENAI_BASE_URL=<server.base_url>.
+- FakeSerpServer answers SerpAPI's /search endpoint with Google Shopping
+  results. Point SearchService at it with SERPAPI_BASE_URL=<server.base_url>.
+- FakeDatabase replaces the repository functions with in-memory versions.
+- FakeContext, FakeChannel and FakeMessage mimic the parts of discord.py the
+  command handlers and ShoppingHandler touch.
+
+Both servers sleep for a simulated latency (plus random jitter) and fail a
+configurable fraction of requests, and can be given canned responses.
+"""
+import asyncio
+import collections
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+ITEMS = ["Sony WH-1000XM5", "Bose QuietComfort 45", "Sennheiser Momentum 4", "Anker Soundcore Q45", "JBL Tune 760NC"]
+SHOPS = ["Example Shop", "Best Buy", "Amazon.com", "Walmart", "Target"]
+
+
+def fake_items(count):
+    return [{"item_name": ITEMS[i % len(ITEMS)]} for i in range(count)]
+
+
+def fake_completion(prompt: str):
+    """Picks a response shape from the prompt; unknown prompts get every field. Plain-text answers are strings."""
+    parsed = {"item_name": "wireless headphones", "type": "audio", "price_range": "under $300", "number_of_results": 3}
+    results = {"results": [
+        {"item_name": item["item_name"], "price": "$199.99", "link": f"https://shop.example/{i}", "source": "Example Shop"}
+        for i, item in enumerate(fake_items(3))
+    ]}
+    recommendations = {"recommendations": fake_items(3)}
+
+    if "'results'" in prompt:
+        return results
+    if "Parse the customer's request and recommend" in prompt:
+        return {**parsed, **recommendations}
+    if "Customer request:" in prompt:
+        return recommendations
+    if "Convert the following query" in prompt:
+        return parsed
+    if "complementary items that would form a complete set" in prompt:
+        return {"category": "audio", "items": [i["item_name"] for i in fake_items(4)]}
+    if "extracts product search queries from chat" in prompt:
+        return {"item": "wireless headphones", "type": "electronics", "price_range": "50-200", "number_of_results": 3}
+    if "suggest ONE surprising item" in prompt:
+        return "Ember Temperature Control Smart Mug"
+    if "suggest 5 products" in prompt:
+        return {"recommendations": [i["item_name"] for i in fake_items(5)]}
+    return {**parsed, **recommendations, **results, "category": "audio", "items": [i["item_name"] for i in fake_items(4)]}
+
+
+def fake_shopping_results(query: str, count: int = 8):
+    return [
+        {
+            "position": i + 1,
+            "title": f"{query} - {ITEMS[i % len(ITEMS)]}",
+            "link": f"https://shop.example/{zlib.crc32(f'{query}/{i}'.encode())}",
+            "price": f"${49.99 + 25 * i:.2f}",
+            "source": SHOPS[i % len(SHOPS)],
+            "thumbnail": f"https://shop.example/thumbs/{i}.png",
+        }
+        for i in range(count)
+    ]
+
+
+class FakeServer:
+    """
+    Base for the fake HTTP services: runs a ThreadingHTTPServer on a free
+    port in a background thread and counts requests and injected errors.
+
+    Each request takes `latency` seconds plus up to `jitter` seconds of
+    random noise, and fails with probability `error_rate`.
+    """
+
+    path_prefix = ""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, canned=None, port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.canned = canned or {}
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{self.path_prefix}"
+
+    def begin_request(self, extra_delay=0.0):
+        """Counts the request, sleeps for its simulated latency and returns True if it should fail."""
+        failed = random.random() < self.error_rate
+        with self.lock:
+            self.calls += 1
+            self.errors += int(failed)
+        time.sleep(self.latency + extra_delay + random.uniform(0, self.jitter))
+        return failed
+
+    def handle(self, method, path, query, body):
+        """Returns (status, payload) for one request."""
+        raise NotImplementedError
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                status, payload = server.handle(method, url.path, parse_qs(url.query), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeModelServer(FakeServer):
+    """
+    Serves /v1/chat/completions. On top of the base latency each response
+    takes `seconds_per_token` for every completion token. `canned` maps a
+    prompt substring to the response returned instead of the built-in one.
+    Failed requests get a 500, which the OpenAI client retries.
+    """
+
+    path_prefix = "/v1"
+
+    def __init__(self, latency=0.6, seconds_per_token=0.01, jitter=0.05, error_rate=0.0, canned=None, port=0):
+        super().__init__(latency=latency, jitter=jitter, error_rate=error_rate, canned=canned, port=port)
+        self.seconds_per_token = seconds_per_token
+
+    def completion(self, prompt):
+        for marker, response in self.canned.items():
+            if marker in prompt:
+                return response
+        return fake_completion(prompt)
+
+    def handle(self, method, path, query, body):
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        response = self.completion(prompt)
+        content = response if isinstance(response, str) else json.dumps(response)
+        completion_tokens = len(content) // 4
+        prompt_tokens = len(prompt) // 4
+
+        if self.begin_request(self.seconds_per_token * completion_tokens):
+            return 500, {"error": {"message": "Injected failure", "type": "server_error", "code": None}}
+
+        return 200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+class FakeSerpServer(FakeServer):
+    """
+    Serves SerpAPI's /search with `results_per_query` shopping results built
+    from the query. `canned` maps a query substring to a list of results.
+    Failed requests answer like SerpAPI does, with an "error" key.
+    """
+
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, canned=None, results_per_query=8, port=0):
+        super().__init__(latency=latency, jitter=jitter, error_rate=error_rate, canned=canned, port=port)
+        self.results_per_query = results_per_query
+
+    def handle(self, method, path, query, body):
+        if path != "/search":
+            return 404, {"error": f"Unknown path {path}"}
+        q = query.get("q", [""])[0]
+        if self.begin_request():
+            return 500, {"error": "Injected failure"}
+        for marker, results in self.canned.items():
+            if marker in q:
+                return 200, {"shopping_results": results}
+        return 200, {"shopping_results": fake_shopping_results(q, self.results_per_query)}
+
+
+class FakeSession:
+    """Stands in for a SQLAlchemy session; the fake repository functions never touch it."""
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """
+    In-memory versions of the repository functions used on the hot paths.
+    install() swaps them into the modules that imported them by name, and
+    `session` can be passed anywhere a db_getter is expected. Each call sleeps
+    for `latency` seconds, like the blocking database driver would.
+    """
+
+    REPOSITORY_FUNCTIONS = (
+        "create_or_get_user", "create_query", "create_recommended_item", "get_recent_queries_by_user",
+        "get_wishlist_items_for_user", "delete_all_recommendations_for_user", "insert_recommendation_for_user",
+    )
+
+    def __init__(self, latency=0.0, history=20):
+        self.latency = latency
+        self.users = {}
+        self.queries = collections.defaultdict(lambda: collections.deque(maxlen=history))
+        self.writes = collections.Counter()
+
+    def session(self):
+        return FakeSession()
+
+    def install(self, *modules):
+        for module in modules:
+            for name in self.REPOSITORY_FUNCTIONS:
+                if hasattr(module, name):
+                    setattr(module, name, getattr(self, name))
+
+    def _row(self, table, **fields):
+        if self.latency:
+            time.sleep(self.latency)
+        self.writes[table] += 1
+        return SimpleNamespace(id=str(uuid.uuid4()), **fields)
+
+    def create_or_get_user(self, db, discord_id, username):
+        if discord_id not in self.users:
+            self.users[discord_id] = self._row("users", discord_id=discord_id, username=username)
+        return self.users[discord_id]
+
+    def create_query(self, db, user_id, query_type, raw_query, interpreted_query):
+        query = self._row("queries", user_id=user_id, query_type=query_type,
+                          raw_query=raw_query, interpreted_query=interpreted_query)
+        self.queries[user_id].append(query)
+        return query
+
+    def create_recommended_item(self, db, query_id, item_name, vendor, link, price, metadata):
+        return self._row("recommended_items", query_id=query_id, item_name=item_name)
+
+    def get_recent_queries_by_user(self, db, user_id, limit=5):
+        return list(self.queries[user_id])[-limit:]
+
+    def get_wishlist_items_for_user(self, db, user_id, limit=None):
+        return []
+
+    def delete_all_recommendations_for_user(self, db, user_id):
+        self.writes["recommendation_deletes"] += 1
+
+    def insert_recommendation_for_user(self, db, user_id, item_name, vendor, link, price, metadata):
+        self._row("recommendation_service_table", user_id=user_id, item_name=item_name)
+
+
+_ids = itertools.count(10 ** 17)
+
+
+class FakeMessage:
+    _state = None  # commands.Context reads the connection state from its message
+
+    def __init__(self, channel, content="", author=None, embeds=None, **kwargs):
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content or ""
+        self.author = author or channel.bot_user
+        self.embeds = embeds or ([kwargs["embed"]] if kwargs.get("embed") else [])
+        self.deleted = False
+
+    async def delete(self):
+        await self.channel.simulate_api_call()
+        self.deleted = True
+
+    async def edit(self, content=None, **kwargs):
+        await self.channel.simulate_api_call()
+        if content is not None:
+            self.content = content
+
+
+class FakeChannel:
+    """
+    A text channel that records what the bot sends. Every API call (send,
+    delete, edit) sleeps for `api_latency` seconds to mimic the round trip
+    to Discord.
+    """
+
+    def __init__(self, guild=None, api_latency=0.05, history=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.api_latency = api_latency
+        self.bot_user = SimpleNamespace(id=next(_ids), name="PricePal", bot=True)
+        self.messages = list(history or [])  # oldest first
+        self.sent = []
+
+    async def simulate_api_call(self):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+    async def send(self, content=None, **kwargs):
+        await self.simulate_api_call()
+        message = FakeMessage(self, content, **kwargs)
+        self.sent.append(message)
+        self.messages.append(message)
+        return message
+
+    async def history(self, limit=100):
+        for message in reversed(self.messages[-limit:]):
+            yield message
+
+
+class FakeContext:
+    """The subset of commands.Context the command handlers use."""
+
+    def __init__(self, channel, author, content=""):
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.message = FakeMessage(channel, content, author=author)
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+def fake_user(name=None):
+    user_id = next(_ids)
+    return SimpleNamespace(id=user_id, name=name or f"user{user_id % 100000}", bot=False)
+
+
+def fake_guild(shard_id=0):
+    return SimpleNamespace(id=next(_ids), shard_id=shard_id, name="Benchmark Guild")
+
+
+def user_message(channel, author, content):
+    """A message from `author`, as on_message or process_message would receive it."""
+    message = FakeMessage(channel, content, author=author)
+    channel.messages.append(message)
+    return message
@@ -0,0 +1,289 @@
+"""
+Benchmarks the bot's hot paths fully offline, so performance changes can be
+compared in CI. OpenAI and SerpAPI are replaced by local fake HTTP servers,
+the database by in-memory repository functions and Discord by fake channels.
+
+Scenarios (each run by N concurrent simulated users):
+
+- pipeline      PromptedResponse.run_prompted_response
+- chat          ShoppingHandler.process_message for a shopping message
+- find          the !find command handler, until its job finishes
+- multi_find    the !multi_find command handler
+- feeling_lucky the !feeling_lucky command handler
+
+Usage: python scripts/offline_benchmark.py [--users 20] [--requests 5] [--scenarios find,chat]
+       [--model-latency 0.6] [--model-error-rate 0.02] [--search-latency 0.3] [--json results.json]
+
+Model and search caches are disabled unless --with-caches is given, so every
+request pays for its calls. Bot output is hidden unless --verbose is given.
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_services import (
+    FakeChannel, FakeContext, FakeDatabase, FakeModelServer, FakeSerpServer, fake_guild, fake_user, user_message
+)
+from pipeline_benchmark import QUERIES, percentile
+from services.job_queue import JobQueue, INTERACTIVE
+
+SCENARIOS = ("pipeline", "chat", "find", "multi_find", "feeling_lucky")
+
+CHAT = [
+    "has anyone tried the new noise cancelling headphones?",
+    "my old ones finally broke lol",
+    "I'm looking to buy wireless headphones under $200, any suggestions?",
+    "I'd want something comfortable for long flights",
+    "sony or bose maybe",
+]
+
+# Interactive jobs a command queued during the current operation
+_operation_jobs = contextvars.ContextVar("operation_jobs", default=None)
+
+
+class TrackedJobQueue(JobQueue):
+    """
+    Lets each operation wait for the interactive jobs its command queued.
+    Background recommendation refreshes are left out, as users don't wait on them.
+    """
+
+    def submit(self, name, factory, priority=INTERACTIVE, **kwargs):
+        job = super().submit(name, factory, priority=priority, **kwargs)
+        jobs = _operation_jobs.get()
+        if job is not None and jobs is not None and priority == INTERACTIVE:
+            jobs.append(job)
+        return job
+
+
+class Harness:
+    """Builds the bot's components against the fakes and runs one operation of each scenario."""
+
+    def __init__(self, args):
+        import discord
+        from discord.ext import commands
+        import modules.bot_commands
+        import modules.shopping_handler
+        import utils.recommendation_service
+        from modules.bot_commands import register_commands
+        from modules.command_quotas import CommandQuotas
+        from modules.cooldown_manager import CooldownManager
+        from modules.message_history import MessageHistory
+        from modules.shopping_handler import ShoppingHandler
+        from prompted_response import PromptedResponse
+
+        self.args = args
+        self.database = FakeDatabase(latency=args.db_latency)
+        self.database.install(modules.bot_commands, modules.shopping_handler, utils.recommendation_service)
+
+        self.bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+        # Quotas are off so every simulated request does its full work; the job queue never turns work away
+        self.job_queue = TrackedJobQueue(workers=args.job_workers, max_pending=10 ** 6)
+        register_commands(self.bot, self.database.session, message_history=MessageHistory(),
+                          command_quotas=CommandQuotas(user_concurrency=0, guild_per_minute=0, global_in_flight=0),
+                          job_queue=self.job_queue)
+
+        self.prompted_response = PromptedResponse()
+        self.shopping_handler = ShoppingHandler(self.database.session)
+        # Every simulated user has their own channel, so only the channel budget applies
+        self.cooldown_manager = CooldownManager(cooldown_seconds=0.001, limits={})
+
+        self.guilds = [fake_guild(shard_id=i) for i in range(args.guilds)]
+
+    def new_user(self, index):
+        guild = self.guilds[index % len(self.guilds)]
+        channel = FakeChannel(guild, api_latency=self.args.discord_latency)
+        author = fake_user()
+        for line in CHAT * 2:
+            user_message(channel, fake_user(), line)
+        return channel, author
+
+    async def run_command(self, name, ctx, **kwargs):
+        jobs = []
+        _operation_jobs.set(jobs)
+        await self.bot.get_command(name).callback(ctx, **kwargs)
+        await asyncio.gather(*(job.wait() for job in jobs))
+
+    async def operation(self, scenario, channel, author, query):
+        """Runs one operation and returns whether it succeeded."""
+        sent_before = len(channel.sent)
+        if scenario == "pipeline":
+            return bool(await self.prompted_response.run_prompted_response(query, "us"))
+        if scenario == "chat":
+            message = user_message(channel, author, CHAT[2])
+            context = [m.content for m in channel.messages[-10:] if not m.author.bot]
+            await self.shopping_handler.process_message(message, context, self.cooldown_manager)
+        elif scenario == "find":
+            await self.run_command("find", FakeContext(channel, author, f"!find {query}"), query=query)
+        elif scenario == "multi_find":
+            await self.run_command("multi_find", FakeContext(channel, author, "!multi_find ski equipment"),
+                                   query="ski equipment")
+        elif scenario == "feeling_lucky":
+            await self.run_command("feeling_lucky", FakeContext(channel, author, "!feeling_lucky"))
+        return not any(m.content.startswith("Sorry") for m in channel.sent[sent_before:])
+
+
+async def run_scenario(harness, scenario, users, requests, servers):
+    model_server, serp_server = servers
+    calls_before = (model_server.calls, serp_server.calls, model_server.errors + serp_server.errors)
+    timings, failures = [], 0
+
+    async def simulated_user(index):
+        nonlocal failures
+        channel, author = harness.new_user(index)
+        for i in range(requests):
+            query = QUERIES[(index + i) % len(QUERIES)]
+            start = time.perf_counter()
+            try:
+                ok = await harness.operation(scenario, channel, author, query)
+            except Exception as e:
+                print(f"{scenario} failed: {e}")
+                ok = False
+            timings.append(time.perf_counter() - start)
+            failures += int(not ok)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[simulated_user(i) for i in range(users)])
+    elapsed = time.perf_counter() - start
+
+    # Let background work (like recommendation refreshes) finish so it is charged to this scenario.
+    # The job queue's workers never exit, so wait for its queue to drain instead of for them.
+    try:
+        await asyncio.wait_for(harness.job_queue.queue.join(), timeout=60)
+    except asyncio.TimeoutError:
+        print(f"{scenario}: background jobs still running after 60s", file=sys.__stderr__)
+    background = asyncio.all_tasks() - {asyncio.current_task()} - set(harness.job_queue.workers)
+    if background:
+        await asyncio.wait(background, timeout=60)
+
+    operations = len(timings)
+    return {
+        "scenario": scenario,
+        "operations": operations,
+        "failures": failures,
+        "throughput": operations / elapsed,
+        "mean": statistics.mean(timings),
+        "p50": percentile(timings, 50),
+        "p90": percentile(timings, 90),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+        "model_calls_per_op": (model_server.calls - calls_before[0]) / operations,
+        "search_calls_per_op": (serp_server.calls - calls_before[1]) / operations,
+        "injected_errors": model_server.errors + serp_server.errors - calls_before[2],
+    }
+
+
+def bot_output(quiet):
+    return contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext()
+
+
+async def run_benchmark(args, servers):
+    from services.openai_client import close_openai_clients
+
+    quiet = None if args.verbose else open(os.devnull, "w")
+    results, harness = [], None
+    try:
+        with bot_output(quiet):
+            harness = Harness(args)
+        for scenario in args.scenarios:
+            with bot_output(quiet):
+                result = await run_scenario(harness, scenario, args.users, args.requests, servers)
+            results.append(result)
+            print(f"{scenario:<14}{result['operations']:>5}{result['failures']:>6}{result['throughput']:>9.2f}"
+                  + "".join(f"{result[key]:>8.2f}s" for key in ("mean", "p50", "p95", "p99"))
+                  + f"{result['model_calls_per_op']:>8.1f}{result['search_calls_per_op']:>8.1f}")
+    finally:
+        if harness is not None:
+            # Drop recommendation refreshes still queued behind the measured work
+            await harness.job_queue.stop()
+        await close_openai_clients()
+        if quiet:
+            quiet.close()
+    return results
+
+
+def parse_scenarios(value):
+    scenarios = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return scenarios
+
+
+def load_canned(path):
+    if not path:
+        return {}, {}
+    with open(path) as f:
+        canned = json.load(f)
+    return canned.get("model", {}), canned.get("search", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=5, help="operations per user per scenario")
+    parser.add_argument("--scenarios", type=parse_scenarios, default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--guilds", type=int, default=5, help="guilds the users are spread across")
+    parser.add_argument("--model-latency", type=float, default=0.6, help="base seconds per model call")
+    parser.add_argument("--model-jitter", type=float, default=0.1, help="random extra seconds per model call")
+    parser.add_argument("--model-error-rate", type=float, default=0.0, help="fraction of model calls that fail")
+    parser.add_argument("--per-token", type=float, default=0.005, help="extra seconds per completion token")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="base seconds per shopping search")
+    parser.add_argument("--search-jitter", type=float, default=0.1, help="random extra seconds per search")
+    parser.add_argument("--search-error-rate", type=float, default=0.0, help="fraction of searches that fail")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per Discord API call")
+    parser.add_argument("--job-workers", type=int, default=8, help="workers running command jobs, as JOB_WORKERS")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds per repository call")
+    parser.add_argument("--canned", help='JSON file of canned responses: {"model": {prompt substring: response}, '
+                                         '"search": {query substring: [results]}}')
+    parser.add_argument("--with-caches", action="store_true", help="keep the model and semantic caches on")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own output")
+    args = parser.parse_args()
+
+    canned_model, canned_search = load_canned(args.canned)
+    model_server = FakeModelServer(latency=args.model_latency, seconds_per_token=args.per_token,
+                                   jitter=args.model_jitter, error_rate=args.model_error_rate,
+                                   canned=canned_model).start()
+    serp_server = FakeSerpServer(latency=args.search_latency, jitter=args.search_jitter,
+                                 error_rate=args.search_error_rate, canned=canned_search).start()
+
+    # Everything the bot talks to is local; set before config is imported
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": model_server.base_url,
+        "SERP_API_KEY": "benchmark",
+        "SERPAPI_BASE_URL": serp_server.base_url,
+        "PREVIEW_IMAGE_SCRAPING": "0",
+    })
+    os.environ.pop("RATE_LIMIT_REDIS_URL", None)
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+    if not args.with_caches:
+        os.environ.update({"LLM_CACHE_METHODS": "", "SEMANTIC_CACHE_ENABLED": "0"})
+
+    print(f"{args.users} users x {args.requests} requests per scenario")
+    print(f"{'scenario':<14}{'ops':>5}{'fail':>6}{'ops/s':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'llm/op':>8}{'serp/op':>8}")
+    try:
+        results = asyncio.run(run_benchmark(args, (model_server, serp_server)))
+    finally:
+        model_server.stop()
+        serp_server.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "json"}, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares end-to-end latency of the sequential and merged recommendation
+pipelines against a stubbed model server, so the numbers only reflect the
+number and size of model round trips.
+
+Usage: python scripts/pipeline_benchmark.py [--queries 20] [--latency 0.6] [--search-latency 0.2]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_services import FakeModelServer
+
+QUERIES = [
+    "wireless headphones under $300", "gaming laptop under 1000", "running shoes for flat feet",
+    "espresso machine for beginners", "4k monitor for photo editing", "ergonomic office chair",
+    "camping tent for 4 people", "mechanical keyboard with quiet switches", "air fryer under $150",
+    "kids bike with training wheels",
+]
+
+
+def build_pipeline(mode, search_latency):
+    from prompted_response import PromptedResponse
+    from services.openai_service import OpenAIService
+    from services.search_service import SearchService
+    from services.llm_cache import LLMCache
+    from services.semantic_cache import SemanticQueryCache
+
+    class FakeSearchService(SearchService):
+        def search_shopping_results(self, item_name, region, price_range=None):
+            time.sleep(search_latency)
+            return [{"title": item_name, "link": "https://shop.example/item", "price": "$199.99",
+                     "source": "Example Shop", "thumbnail": "https://shop.example/item.png"}]
+
+    # Caches are disabled so every query pays for its model calls
+    return PromptedResponse(
+        openai_service=OpenAIService(api_key="benchmark", cache=LLMCache()),
+        search_service=FakeSearchService(api_key="benchmark"),
+        semantic_cache=SemanticQueryCache(enabled=False),
+        pipeline_mode=mode
+    )
+
+
+async def run_mode(mode, server, queries, search_latency):
+    pipeline = build_pipeline(mode, search_latency)
+    calls_before = server.calls
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        results = await pipeline.run_prompted_response(query, "us")
+        timings.append(time.perf_counter() - start)
+        if not results:
+            print(f"  {mode}: no results for '{query}'")
+    return timings, (server.calls - calls_before) / len(queries)
+
+
+async def run_modes(server, queries, search_latency):
+    """
+    Runs both modes in one event loop. The OpenAI client is shared process-wide
+    and its pooled connections belong to the loop that opened them, so a
+    second asyncio.run() would reuse connections from a closed loop.
+    """
+    from services.openai_client import close_openai_clients
+
+    results = {}
+    try:
+        for mode in ("sequential", "merged"):
+            results[mode] = await run_mode(mode, server, queries, search_latency)
+    finally:
+        await close_openai_clients()
+    return results
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20, help="queries per pipeline mode")
+    parser.add_argument("--latency", type=float, default=0.6, help="base seconds per model call")
+    parser.add_argument("--per-token", type=float, default=0.01, help="extra seconds per completion token")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="seconds per stubbed shopping search")
+    args = parser.parse_args()
+
+    server = FakeModelServer(latency=args.latency, seconds_per_token=args.per_token).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+
+    queries = [QUERIES[i % len(QUERIES)] + f" #{i}" for i in range(args.queries)]
+    try:
+        results = asyncio.run(run_modes(server, queries, args.search_latency))
+        print(f"{'mode':<12}{'calls/query':>12}{'mean':>9}{'p50':>9}{'p95':>9}")
+        for mode, (timings, calls) in results.items():
+            print(f"{mode:<12}{calls:>12.1f}{statistics.mean(timings):>8.2f}s"
+                  f"{percentile(timings, 50):>8.2f}s{percentile(timings, 95):>8.2f}s")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
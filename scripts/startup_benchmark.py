@@ -0,0 +1,92 @@
+"""
+Measures how long a cold `import pricepal` takes and how much memory it leaves
+behind, using `python -X importtime` to show which modules dominate.
+
+Usage: python scripts/startup_benchmark.py [--runs 5] [--top 15] [--json results.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports the bot module without connecting to anything, then reports peak RSS
+PROBE = (
+    "import time, resource; start = time.perf_counter(); import pricepal; "
+    "elapsed = time.perf_counter() - start; "
+    "print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def run_probe():
+    env = dict(os.environ)
+    # create_engine() needs a URL but doesn't connect until first use
+    env.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+    env["WARM_UP_IMPORTS"] = "0"
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing pricepal failed:\n{result.stderr[-2000:]}")
+
+    elapsed, max_rss_kb = result.stdout.strip().splitlines()[-1].split()
+    return float(elapsed), int(max_rss_kb), parse_importtime(result.stderr)
+
+
+def parse_importtime(stderr):
+    """Returns {module: cumulative microseconds} from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules[name] = int(cumulative_us)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold bot startup.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold imports to time")
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list")
+    parser.add_argument("--json", default=None, help="Append the results as one JSON line to this file")
+    args = parser.parse_args()
+
+    timings, rss, imports = [], [], {}
+    for _ in range(args.runs):
+        elapsed, max_rss_kb, modules = run_probe()
+        timings.append(elapsed)
+        rss.append(max_rss_kb)
+        for name, cumulative_us in modules.items():
+            imports.setdefault(name, []).append(cumulative_us)
+
+    slowest = sorted(
+        ((name, statistics.median(values)) for name, values in imports.items()),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+
+    print(f"Cold import of bot over {args.runs} runs:")
+    print(f"  median {statistics.median(timings) * 1000:.0f} ms, min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms")
+    print(f"  peak RSS {statistics.median(rss) / 1024:.1f} MiB")
+    print("\nSlowest imports (median cumulative, including their own imports):")
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "runs": args.runs,
+                "median_import_ms": statistics.median(timings) * 1000,
+                "peak_rss_mib": statistics.median(rss) / 1024,
+                "slowest_imports_ms": {name: us / 1000 for name, us in slowest},
+            }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Summarizes spans written by the "json" tracing exporter: count, mean, p50 and
+p95 duration per stage, optionally limited to one command.
+
+Usage: python scripts/trace_report.py [traces.jsonl] [--command find]
+"""
+import argparse
+import json
+import statistics
+from collections import defaultdict
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default="traces.jsonl")
+    parser.add_argument("--command", help="only spans from this command, e.g. find or chat")
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    with open(args.path) as f:
+        for line in f:
+            span = json.loads(line)
+            if args.command and span["attributes"].get("command") != args.command:
+                continue
+            durations[span["name"]].append(span["duration_ms"])
+
+    if not durations:
+        print("No matching spans.")
+        return
+
+    print(f"{'stage':<36}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}")
+    for name, values in sorted(durations.items(), key=lambda item: -percentile(item[1], 95)):
+        print(f"{name:<36}{len(values):>7}{statistics.mean(values):>8.1f}ms"
+              f"{percentile(values, 50):>8.1f}ms{percentile(values, 95):>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
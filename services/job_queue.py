@@ -0,0 +1,193 @@
+import asyncio
+import collections
+import contextvars
+import itertools
+import time
+
+from services.metrics import registry
+
+# Lower runs first: user-facing commands ahead of background work
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+JOBS = registry.counter("pricepal_jobs_total", "Jobs by name and how they ended", ["job", "outcome"])
+JOB_WAIT_SECONDS = registry.histogram(
+    "pricepal_job_wait_seconds", "Time jobs spent queued before a worker picked them up", ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+JOB_RUN_SECONDS = registry.histogram("pricepal_job_run_seconds", "Time jobs spent running", ["job"])
+
+
+class Job:
+    """One queued coroutine. `finished` resolves with the outcome once the job ends in any way."""
+
+    __slots__ = ("name", "factory", "priority", "message_id", "on_done", "context",
+                 "enqueued_at", "started_at", "task", "cancelled", "finished")
+
+    def __init__(self, name, factory, priority, message_id, on_done, context):
+        self.name = name
+        self.factory = factory
+        self.priority = priority
+        self.message_id = message_id
+        self.on_done = on_done
+        self.context = context
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.task = None
+        self.cancelled = False
+        self.finished = asyncio.get_running_loop().create_future()
+
+    async def wait(self):
+        return await asyncio.shield(self.finished)
+
+
+class JobQueue:
+    """
+    Runs long command jobs on a fixed pool of `workers` instead of one
+    untracked task each, so a burst of commands can't start more pipelines
+    than the database pool and upstream limits can serve.
+
+    Jobs run in priority order (INTERACTIVE before BACKGROUND), first come
+    first served within a priority. At most `max_pending` jobs wait; beyond
+    that submit() turns new jobs away. A job tied to a message is cancelled,
+    queued or running, when that message is deleted. Jobs run in the context
+    they were submitted from, so tracing spans and usage attribution carry over.
+    """
+
+    def __init__(self, workers=8, max_pending=100):
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.queue = asyncio.PriorityQueue()  # Cancelled jobs stay in it until a worker skips them
+        self.waiting = 0  # Jobs queued and not cancelled
+        self.sequence = itertools.count()
+        self.workers = []
+        self.running = set()
+        self.by_message = {}
+        self.recent_waits = collections.deque(maxlen=200)
+
+    @property
+    def pending(self):
+        return self.waiting
+
+    def depth(self):
+        """Queued jobs per priority name."""
+        counts = collections.Counter(PRIORITY_NAMES.get(job.priority, str(job.priority))
+                                     for _, _, job in list(self.queue._queue) if not job.cancelled)
+        return dict(counts)
+
+    def _ensure_workers(self):
+        if self.workers:
+            return
+        loop = asyncio.get_running_loop()
+        self.workers = [loop.create_task(self._work()) for _ in range(self.worker_count)]
+
+    def submit(self, name, factory, priority=INTERACTIVE, message_id=None, on_done=None):
+        """
+        Queues `factory()` (a zero-argument coroutine function) and returns its
+        Job, or None if the queue is full. `on_done` is called exactly once,
+        however the job ends, including when it is turned away here.
+        """
+        if self.pending >= self.max_pending:
+            JOBS.inc(job=name, outcome="rejected")
+            if on_done is not None:
+                on_done()
+            return None
+
+        self._ensure_workers()
+        job = Job(name, factory, priority, message_id, on_done, contextvars.copy_context())
+        if message_id is not None:
+            self.by_message[message_id] = job
+        self.waiting += 1
+        self.queue.put_nowait((priority, next(self.sequence), job))
+        return job
+
+    def cancel_for_message(self, message_id) -> bool:
+        """Cancels the job started by `message_id`, if any. Returns whether one was found."""
+        job = self.by_message.pop(message_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        if job.task is not None:
+            job.task.cancel()
+        elif not job.finished.done():
+            # Still queued: free its slot and run on_done (e.g. a quota release) now, not when a worker reaches it
+            self.waiting -= 1
+            self._finish(job, "cancelled")
+        return True
+
+    async def _work(self):
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job):
+        if job.finished.done():
+            return  # Cancelled while queued
+        self.waiting -= 1
+        outcome = "cancelled"
+        try:
+            job.started_at = time.monotonic()
+            wait = job.started_at - job.enqueued_at
+            JOB_WAIT_SECONDS.observe(wait, priority=PRIORITY_NAMES.get(job.priority, str(job.priority)))
+            self.recent_waits.append(wait)
+
+            # A task of its own, so cancelling the job leaves the worker running
+            job.task = job.context.run(asyncio.get_running_loop().create_task, job.factory())
+            self.running.add(job)
+            try:
+                await asyncio.wait({job.task})
+            finally:
+                self.running.discard(job)
+                JOB_RUN_SECONDS.observe(time.monotonic() - job.started_at, job=job.name)
+
+            if job.task.cancelled():
+                return
+            error = job.task.exception()
+            if error is not None:
+                outcome = "failed"
+                print(f"Job {job.name} failed: {type(error).__name__}: {error}")
+            else:
+                outcome = "done"
+        finally:
+            self._finish(job, outcome)
+
+    def _finish(self, job, outcome):
+        """Records how the job ended and runs its on_done, exactly once."""
+        if job.finished.done():
+            return
+        JOBS.inc(job=job.name, outcome=outcome)
+        if job.message_id is not None and self.by_message.get(job.message_id) is job:
+            del self.by_message[job.message_id]
+        if job.on_done is not None:
+            try:
+                job.on_done()
+            except Exception as e:
+                print(f"Job {job.name} cleanup failed: {e}")
+        job.finished.set_result(outcome)
+
+    async def stop(self):
+        """Cancels the workers and every running job."""
+        for job in list(self.running):
+            job.task.cancel()
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    def report(self) -> str:
+        depth = ", ".join(f"{count} {name}" for name, count in sorted(self.depth().items())) or "none"
+        waits = sorted(self.recent_waits)
+        lines = [
+            f"Workers: {len(self.running)}/{self.worker_count} busy",
+            f"Queued: {depth} (max {self.max_pending})",
+        ]
+        if waits:
+            lines.append(f"Wait over the last {len(waits)} jobs: p50 {waits[len(waits) // 2]:.2f}s, "
+                         f"max {waits[-1]:.2f}s")
+        running = sorted(self.running, key=lambda job: job.started_at)
+        for job in running[:10]:
+            lines.append(f"  {job.name} running for {time.monotonic() - job.started_at:.1f}s")
+        return "\n".join(lines)
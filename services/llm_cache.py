@@ -0,0 +1,172 @@
+import asyncio
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from config import (
+    LLM_CACHE_METHODS, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_SQLITE_PATH
+)
+from services.llm_usage import collect_usage
+from utils.ttl_cache import TTLCache
+
+
+def normalize_prompt_text(text) -> str:
+    """Lowercases, collapses whitespace and trims punctuation so trivially different prompts share a key."""
+    if text is None:
+        return ""
+    text = re.sub(r"\s+", " ", str(text).lower()).strip()
+    return text.strip(" .!?")
+
+
+class SQLiteCacheStore:
+    """Keeps cache entries on disk so they survive restarts."""
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None, 0
+        return json.loads(row[0]), row[1] - time.time()
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl)
+            )
+            self.conn.commit()
+
+
+class LLMCache:
+    """
+    Caches model responses keyed by (method, model, normalized inputs).
+
+    Entries live in a bounded in-memory LRU with a TTL, optionally backed by
+    SQLite. Each entry remembers the tokens and latency of the call that
+    produced it, so hits report what they saved.
+    """
+
+    def __init__(self, enabled_methods=None, ttl=3600, max_entries=2048, sqlite_path=None):
+        self.enabled_methods = set(enabled_methods or ())
+        self.ttl = ttl
+        self.memory = TTLCache(max_size=max_entries)
+        self.store = None
+        if sqlite_path:
+            try:
+                self.store = SQLiteCacheStore(sqlite_path)
+            except sqlite3.Error as e:
+                print(f"LLM cache persistence disabled: {e}")
+        self.stats = {}
+        # Concurrent identical requests wait for the first one instead of calling the model again
+        self.in_flight = {}
+
+    def is_enabled(self, method: str) -> bool:
+        return method in self.enabled_methods
+
+    def make_key(self, method: str, model: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"{method}:{model}:{digest}"
+
+    def _method_stats(self, method):
+        return self.stats.setdefault(method, {
+            "hits": 0, "misses": 0, "tokens_saved": 0, "seconds_saved": 0.0
+        })
+
+    async def _lookup(self, key):
+        entry = self.memory.get(key)
+        if entry is None and self.store is not None:
+            entry, remaining = await asyncio.to_thread(self.store.get, key)
+            if entry is not None:
+                self.memory.set(key, entry, remaining)
+        return entry
+
+    async def get_or_call(self, method: str, model: str, inputs: Dict[str, Any],
+                          call: Callable[[], Awaitable[Any]],
+                          encode: Callable[[Any], Any] = copy.deepcopy,
+                          decode: Callable[[Any], Any] = copy.deepcopy,
+                          should_cache: Callable[[Any], bool] = bool):
+        """
+        Returns the cached result for these inputs, or awaits `call()` and caches
+        its result. `encode`/`decode` convert results to and from JSON-friendly
+        values (by default both sides are copied, so callers can't modify the cached
+        value), and `should_cache` keeps failures out of the cache.
+        """
+        if not self.is_enabled(method):
+            return await call()
+
+        key = self.make_key(method, model, inputs)
+        stats = self._method_stats(method)
+
+        entry = await self._lookup(key)
+        if entry is None and key in self.in_flight:
+            await asyncio.shield(self.in_flight[key])
+            entry = await self._lookup(key)
+        if entry is not None:
+            stats["hits"] += 1
+            stats["tokens_saved"] += entry["tokens"]
+            stats["seconds_saved"] += entry["seconds"]
+            return decode(entry["value"])
+
+        stats["misses"] += 1
+        done = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = done
+        try:
+            start = time.perf_counter()
+            with collect_usage() as usage:
+                result = await call()
+            if should_cache(result):
+                entry = {
+                    "value": encode(result),
+                    "tokens": usage["total_tokens"],
+                    "seconds": time.perf_counter() - start,
+                }
+                self.memory.set(key, entry, self.ttl)
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.set, key, entry, self.ttl)
+            return result
+        finally:
+            self.in_flight.pop(key, None)
+            done.set_result(None)
+
+    def report(self) -> str:
+        """Formats per-method hit rates and savings."""
+        if not self.stats:
+            return "No cacheable model calls yet."
+        lines = []
+        for method, stats in sorted(self.stats.items()):
+            total = stats["hits"] + stats["misses"]
+            hit_rate = stats["hits"] / total * 100 if total else 0.0
+            lines.append(
+                f"{method}: {stats['hits']}/{total} hits ({hit_rate:.0f}%), "
+                f"saved {stats['tokens_saved']} tokens and {stats['seconds_saved']:.1f}s"
+            )
+        lines.append(f"Entries in memory: {len(self.memory)}")
+        return "\n".join(lines)
+
+
+# Shared by every OpenAIService in the process
+llm_cache = LLMCache(
+    enabled_methods=LLM_CACHE_METHODS,
+    ttl=LLM_CACHE_TTL,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    sqlite_path=LLM_CACHE_SQLITE_PATH
+)
@@ -0,0 +1,67 @@
+import contextvars
+from contextlib import contextmanager
+
+from services.metrics import LLM_CALLS, LLM_TOKENS
+from services.usage_ledger import usage_ledger
+
+# Usage collectors active for the current task; every model call adds its token counts to each
+_collectors = contextvars.ContextVar("llm_usage_collectors", default=())
+
+# Who model calls in the current task are charged to: user_id, guild_id and command
+_attribution = contextvars.ContextVar("llm_usage_attribution", default={})
+
+
+@contextmanager
+def collect_usage():
+    """
+    Collects token usage from every model call made inside the block,
+    including calls made by nested coroutines awaited from it.
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    token = _collectors.set(_collectors.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _collectors.reset(token)
+
+
+def set_usage_attribution(user_id=None, guild_id=None, command=None):
+    """
+    Charges model calls made by the current task, and by tasks it creates
+    afterwards, to the given user, guild and command. Fields left as None keep
+    their current value. Returns a token for resetting the attribution.
+    """
+    fields = {"user_id": user_id, "guild_id": guild_id, "command": command}
+    return _attribution.set({**_attribution.get(), **{k: v for k, v in fields.items() if v is not None}})
+
+
+@contextmanager
+def usage_attribution(user_id=None, guild_id=None, command=None):
+    """Charges model calls made inside the block to the given user, guild and command."""
+    token = set_usage_attribution(user_id=user_id, guild_id=guild_id, command=command)
+    try:
+        yield
+    finally:
+        _attribution.reset(token)
+
+
+def record_usage(response, method: str = "unknown", seconds: float = 0.0):
+    """
+    Adds a chat completion's token usage to every active collector, the
+    per-method metrics and the usage ledger, charged to the current attribution.
+    """
+    usage = getattr(response, "usage", None)
+    prompt_tokens = (usage.prompt_tokens or 0) if usage is not None else 0
+    completion_tokens = (usage.completion_tokens or 0) if usage is not None else 0
+    LLM_CALLS.inc(method=method)
+    if usage is not None:
+        LLM_TOKENS.inc(prompt_tokens, method=method, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, method=method, kind="completion")
+    for collector in _collectors.get():
+        collector["calls"] += 1
+        if usage is not None:
+            collector["prompt_tokens"] += prompt_tokens
+            collector["completion_tokens"] += completion_tokens
+            collector["total_tokens"] += usage.total_tokens or 0
+    usage_ledger.record(method, getattr(response, "model", None), prompt_tokens, completion_tokens,
+                        seconds, **_attribution.get())
@@ -0,0 +1,118 @@
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from services.metrics import registry
+
+LOOP_STALLS = registry.counter("pricepal_loop_stalls_total", "Times the event loop was blocked past the watchdog threshold")
+LOOP_STALL_SECONDS = registry.histogram(
+    "pricepal_loop_stall_seconds", "How long each detected event loop stall lasted",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Forwards asyncio's debug-mode "Executing <Handle> took N seconds" warnings to the watchdog."""
+
+    def __init__(self, watchdog):
+        super().__init__(level=logging.WARNING)
+        self.watchdog = watchdog
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith("Executing"):
+            self.watchdog.report(f"[LOOP WATCHDOG] Slow callback: {message}")
+
+
+class LoopWatchdog:
+    """
+    Detects code that blocks the event loop.
+
+    A heartbeat coroutine stamps the time every `interval` seconds. A sampling
+    thread checks the stamp; once it is more than `threshold` seconds late,
+    the loop thread's stack is captured on every sample until the loop
+    recovers, and the most common stack is reported with the stall's length.
+    With `asyncio_debug`, asyncio's own slow-callback warnings (which name the
+    offending handle) are reported too.
+    """
+
+    def __init__(self, enabled=False, threshold=0.25, interval=0.05, asyncio_debug=True,
+                 stack_depth=25, history=20):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.interval = interval
+        self.asyncio_debug = asyncio_debug
+        self.stack_depth = stack_depth
+        self.recent = collections.deque(maxlen=history)
+        self.last_beat = time.monotonic()
+        self.loop_thread_id = None
+        self.task = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self, loop):
+        """Starts watching `loop`. Must be called from the loop's thread; safe to call again."""
+        if not self.enabled or self.task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.task = loop.create_task(self._heartbeat())
+
+        if self.asyncio_debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            logging.getLogger("asyncio").addHandler(_SlowCallbackHandler(self))
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+        print(f"Loop watchdog enabled, reporting stalls over {self.threshold * 1000:.0f}ms")
+
+    def stop(self):
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _heartbeat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return "<loop thread not found>"
+        return "".join(traceback.format_stack(frame, limit=self.stack_depth))
+
+    def _watch(self):
+        stall = None
+        while not self.stopped.wait(self.interval / 2):
+            late = time.monotonic() - self.last_beat - self.interval
+            if late >= self.threshold:
+                if stall is None:
+                    stall = {"stacks": collections.Counter(), "longest": 0.0}
+                stall["stacks"][self._capture_stack()] += 1
+                stall["longest"] = max(stall["longest"], late)
+            elif stall is not None:
+                self._report_stall(stall)
+                stall = None
+
+    def _report_stall(self, stall):
+        duration = stall["longest"]
+        LOOP_STALLS.inc()
+        LOOP_STALL_SECONDS.observe(duration)
+        stack, samples = stall["stacks"].most_common(1)[0]
+        total = sum(stall["stacks"].values())
+        self.report(
+            f"[LOOP WATCHDOG] Event loop blocked for {duration:.2f}s; "
+            f"most common stack ({samples}/{total} samples):\n{stack}"
+        )
+
+    def report(self, text):
+        self.recent.append((time.time(), text))
+        print(text)
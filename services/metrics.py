@@ -0,0 +1,260 @@
+import asyncio
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for metrics with optional labels, rendered in the Prometheus text format."""
+
+    type = "untyped"
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def time(self, **labels):
+        """Context manager that observes the duration of the enclosed block."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        for key, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (("le", _format_value(float(bound))),), cumulative
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, cumulative
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class CallbackMetric(Metric):
+    """
+    A metric read from existing state at scrape time. `callback` returns a
+    number, or a dict of label-value tuples to numbers.
+    """
+
+    def __init__(self, registry, name, help, callback, type="gauge", labelnames=()):
+        super().__init__(registry, name, help, labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"Metric {self.name} failed: {e}")
+            return
+        if isinstance(value, dict):
+            for labels, sample in value.items():
+                yield self.name, tuple(zip(self.labelnames, labels)), sample
+        elif value is not None:
+            yield self.name, (), value
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for a /metrics scrape."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            return self.metrics[metric.name]
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self, name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def callback(self, name, help, callback, type="gauge", labelnames=()):
+        """Registers (or replaces) a metric computed at scrape time."""
+        metric = CallbackMetric(self, name, help, callback, type, labelnames)
+        self.metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self.lock:
+            return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves the registry at /metrics from a background thread, so scrapes still
+    answer while the event loop is busy, and samples event loop lag and
+    pending tasks every `lag_interval` seconds.
+    """
+
+    def __init__(self, registry, host="127.0.0.1", port=None, lag_interval=1.0):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self.httpd = None
+        self.task = None
+
+    def start(self, loop):
+        """Starts serving if a port is configured. Safe to call on every on_ready."""
+        if not self.port or self.httpd is not None:
+            return
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"Metrics server could not listen on {self.host}:{self.port}: {e}")
+            return
+        threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True).start()
+        self.task = loop.create_task(monitor_event_loop(self.lag_interval))
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+registry = MetricsRegistry()
+
+MESSAGES_SEEN = registry.counter("pricepal_messages_total", "Messages seen in on_message")
+KEYWORD_GATE = registry.counter(
+    "pricepal_keyword_gate_total", "Messages checked by the shopping keyword gate", ["result"]
+)
+LLM_CALLS = registry.counter("pricepal_llm_calls_total", "Model calls per method", ["method"])
+LLM_TOKENS = registry.counter("pricepal_llm_tokens_total", "Model tokens per method", ["method", "kind"])
+SERPAPI_CALLS = registry.counter("pricepal_serpapi_calls_total", "Google Shopping searches", ["status"])
+SERPAPI_SECONDS = registry.histogram("pricepal_serpapi_seconds", "Google Shopping search latency")
+LOOP_LAG = registry.gauge("pricepal_event_loop_lag_seconds", "Most recent event loop lag")
+LOOP_LAG_SECONDS = registry.histogram(
+    "pricepal_event_loop_lag_distribution_seconds", "Event loop lag samples",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+PENDING_TASKS = registry.gauge("pricepal_pending_tasks", "Tasks scheduled on the event loop")
+
+
+async def monitor_event_loop(interval=1.0):
+    """Samples event loop lag and pending tasks every `interval` seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_SECONDS.observe(lag)
+        PENDING_TASKS.set(len(asyncio.all_tasks(loop)))
@@ -0,0 +1,57 @@
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from config import (
+    OPENAI_API_KEY, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT, OPENAI_MAX_RETRIES, OPENAI_HTTP2
+)
+
+# One client per (api key, base url), shared by every service in the process
+_clients: Dict[Tuple[str, Optional[str]], AsyncOpenAI] = {}
+
+
+def _http_client() -> httpx.AsyncClient:
+    # HTTP/2 needs the optional h2 package (httpx[http2])
+    http2 = OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+    if OPENAI_HTTP2 and not http2:
+        print("OpenAI client: h2 is not installed, falling back to HTTP/1.1")
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+def get_openai_client(api_key: str = None, base_url: str = None) -> AsyncOpenAI:
+    """
+    Returns the process-wide AsyncOpenAI client for this key, creating it on
+    first use. Sharing it keeps TLS connections alive across commands instead
+    of every service opening its own pool.
+    """
+    api_key = api_key or OPENAI_API_KEY
+    key = (api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=_http_client(),
+        )
+        _clients[key] = client
+    return client
+
+
+async def close_openai_clients():
+    """Closes every shared client and its connection pool."""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.close()
@@ -1,17 +1,28 @@
 import json
-from typing import List, Dict, Any
-from openai import AsyncOpenAI
-from models.shopping_models import ShoppingItem, Recommendation, StructuredResponse
-from config import OPENAI_MODEL, REASONING_MODEL
+import time
+from typing import List, Dict, Any, Optional
+from models.shopping_models import (
+    ShoppingItem, Recommendation, StructuredResponse, ParsedRecommendations, QueryRequest, MultiItemQuery, WebResults
+)
+from config import OPENAI_MODEL, REASONING_MODEL, STRUCTURED_OUTPUT_MAX_ATTEMPTS, STRUCTURED_OUTPUT_RETRY_DELAY
 from db.models import Query, RecommendedItem, Reaction
+from services.llm_cache import llm_cache, normalize_prompt_text
+from services.llm_usage import record_usage
+from services.openai_client import get_openai_client
+from services.structured_output import (
+    response_format_for, validate_output, retry_delay, structured_output_stats
+)
 
 
 
 class OpenAIService:
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str = None, cache=None, client=None):
+        self.client = client or get_openai_client(api_key)
         self.model = OPENAI_MODEL
         self.reasoning_model = REASONING_MODEL
+        self.cache = cache or llm_cache
+        self.max_attempts = STRUCTURED_OUTPUT_MAX_ATTEMPTS
+        self.retry_delay = STRUCTURED_OUTPUT_RETRY_DELAY
     
     def strip_markdown(self, content: str) -> str:
         """Removes markdown code block delimiters from the response."""
@@ -26,10 +37,67 @@ class OpenAIService:
             content = "\n".join(lines).strip()
         return content
 
+    async def structured_completion(self, method: str, model_cls, messages: List[Dict], check=None, **kwargs):
+        """
+        Requests a response constrained to `model_cls`'s JSON schema and validates
+        it locally (repairing near-misses). Invalid output, or output rejected by
+        `check`, is retried with jittered backoff up to `max_attempts` times.
+        Returns the validated model, or None once every attempt has failed.
+        """
+        repaired = False
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                start = time.perf_counter()
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    response_format=response_format_for(model_cls),
+                    **kwargs
+                )
+                record_usage(response, method, seconds=time.perf_counter() - start)
+                message = response.choices[0].message
+                if getattr(message, "refusal", None):
+                    raise ValueError(f"Model refused: {message.refusal}")
+
+                parsed, repaired = validate_output(model_cls, message.content or "")
+                if check:
+                    check(parsed)
+                structured_output_stats.record(method, attempt, repaired=repaired)
+                return parsed
+            except ValueError as e:
+                # Includes JSON and pydantic validation errors
+                print(f"{method} attempt {attempt}/{self.max_attempts} returned invalid output: {e}")
+            except Exception as e:
+                # Transport errors have already been retried by the client
+                print(f"{method} error: {e}")
+                structured_output_stats.record(method, attempt, failed=True)
+                return None
+
+            if attempt < self.max_attempts:
+                await retry_delay(attempt - 1, self.retry_delay)
+
+        structured_output_stats.record(method, self.max_attempts, repaired=repaired, failed=True)
+        return None
+
+    @staticmethod
+    def require_items(field: str):
+        """Builds a `check` that rejects responses whose list `field` is empty."""
+        def check(parsed):
+            if not getattr(parsed, field):
+                raise ValueError(f"No {field} returned")
+        return check
+
     async def parse_query(self, query_str: str) -> Dict:
         """
         Parses a natural language query into structured format.
         """
+        return await self.cache.get_or_call(
+            "parse_query", self.model,
+            {"query": normalize_prompt_text(query_str)},
+            lambda: self._parse_query(query_str)
+        )
+
+    async def _parse_query(self, query_str: str) -> Dict:
         prompt = (
             "You are a text parser. Convert the following query into a JSON object with the following structure:\n"
             "{\n"
@@ -62,37 +130,20 @@ class OpenAIService:
             f"Now parse the following query and return only the JSON:\n{query_str}"
         )
 
-        try: 
-            response = await self.client.chat.completions.create(
-                model=self.model,  
-                messages=[
-                    {"role": "system", "content": "You are a helpful text parser."},
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-            )
-            content = response.choices[0].message.content
-
-            parsed = json.loads(content)
-            
-            # Set defaults for missing fields
-            if "item_name" not in parsed or not parsed["item_name"]:
-                parsed["item_name"] = query_str.strip()
-            if "type" not in parsed:
-                parsed["type"] = None
-            if "price_range" not in parsed:
-                parsed["price_range"] = None
-            if "number_of_results" not in parsed:
-                parsed["number_of_results"] = 3
-                
-            return parsed
-        
-        except json.JSONDecodeError:
-            print("Error: Failed to parse JSON from OpenAI response.")
-            return {}
-        except Exception as e:
-            print(f"Parse Query Error: {e}")
+        parsed = await self.structured_completion(
+            "parse_query", QueryRequest,
+            [
+                {"role": "system", "content": "You are a helpful text parser."},
+                {"role": "user", "content": prompt},
+            ]
+        )
+        if parsed is None:
             return {}
+
+        parsed = parsed.model_dump()
+        if not parsed["item_name"].strip():
+            parsed["item_name"] = query_str.strip()
+        return parsed
     
     # Add this method to the PromptedResponse class
 
@@ -100,6 +151,15 @@ class OpenAIService:
         """
         Parses a query for a set of items (like "ski equipment") into up to 4 complementary items.
         """
+        fallback = {"category": query_str, "items": [query_str]}
+        return await self.cache.get_or_call(
+            "parse_multi_item_query", self.model,
+            {"query": normalize_prompt_text(query_str)},
+            lambda: self._parse_multi_item_query(query_str),
+            should_cache=lambda parsed: bool(parsed) and parsed != fallback
+        )
+
+    async def _parse_multi_item_query(self, query_str: str) -> Dict:
         prompt = (
             "You are a product expert who helps find complementary items in a set. "
             "For the following query, identify up to 4 specific complementary items that would form a complete set. "
@@ -117,32 +177,19 @@ class OpenAIService:
             "4. Return only the JSON object"
         )
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful product set expert."},
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-            )
-            content = response.choices[0].message.content
-
-            parsed = json.loads(content)
-            
-            if "category" not in parsed:
-                parsed["category"] = query_str
-            if "items" not in parsed or not isinstance(parsed["items"], list):
-                parsed["items"] = [query_str]
-                
-            parsed["items"] = parsed["items"][:4]
-                    
-            return parsed
-        
-        except Exception as e:
-            print(f"Parse Multi-Item Query Error: {e}")
+        parsed = await self.structured_completion(
+            "parse_multi_item_query", MultiItemQuery,
+            [
+                {"role": "system", "content": "You are a helpful product set expert."},
+                {"role": "user", "content": prompt},
+            ],
+            check=self.require_items("items")
+        )
+        if parsed is None:
             return {"category": query_str, "items": [query_str]}
 
+        return {"category": parsed.category or query_str, "items": parsed.items[:4]}
+
     async def get_recommendations(self, query: Dict) -> List[ShoppingItem]:
         """
         Generates shopping item recommendations based on the query.
@@ -157,6 +204,20 @@ class OpenAIService:
         Returns:
             List[ShoppingItem]: A list of recommended shopping items
         """
+        inputs = {
+            "item_name": normalize_prompt_text(query.get("item_name")),
+            "type": normalize_prompt_text(query.get("type")),
+            "price_range": normalize_prompt_text(query.get("price_range")),
+            "number_of_results": query.get("number_of_results", 3),
+        }
+        return await self.cache.get_or_call(
+            "get_recommendations", self.model, inputs,
+            lambda: self._get_recommendations(query),
+            encode=lambda items: [item.model_dump() for item in items],
+            decode=lambda items: [ShoppingItem(**item) for item in items]
+        )
+
+    async def _get_recommendations(self, query: Dict) -> List[ShoppingItem]:
         number_of_results = query.get("number_of_results", 3)
         customer_request = (
             f"Item_Name: {query.get('item_name')}, "
@@ -199,53 +260,62 @@ class OpenAIService:
             f"Customer request: {customer_request}"
         )
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,  
-                messages=[
-                    {"role": "user", "content": prompt},
-                ],
-                # max_completion_tokens=300,
-                # temperature=0.3 
-            )
+        parsed = await self.structured_completion(
+            "get_recommendations", StructuredResponse,
+            [{"role": "user", "content": prompt}],
+            check=self.require_items("recommendations")
+        )
+        if parsed is None:
+            return []
 
-            # # Extract the message content from the API response.
-            # print(f"Response: {response}")
-
-            content = response.choices[0].message.content.strip()
-            # print(f"Raw Content: {content}")
-
-            content = self.strip_markdown(content)
-            # print(f"Cleaned Content: {content}")
-
-            # Parse the JSON
-            parsed = json.loads(content)
-
-            # Ensure we always have a list of recommendations
-            if isinstance(parsed, dict) and "recommendations" in parsed:
-                recommendations = parsed["recommendations"]
-            elif isinstance(parsed, list):
-                recommendations = parsed
-            else:
-                # If we get an unexpected format, convert it to a list
-                recommendations = [parsed] if isinstance(parsed, dict) else []
-                
-            # Ensure we have exactly the requested number of recommendations
-            while len(recommendations) < number_of_results:
-                recommendations.append({"item_name": f"Alternative {len(recommendations) + 1} for {query.get('item_name')}"})
-            
-            if len(recommendations) > number_of_results:
-                recommendations = recommendations[:number_of_results]
+        # Fewer items than requested are returned as they are rather than padded
+        return parsed.recommendations[:number_of_results]
 
-            # Convert to ShoppingItem objects
-            return [ShoppingItem(item_name=item.get("item_name", "")) for item in recommendations]
+    async def parse_and_recommend(self, query_str: str) -> Optional[ParsedRecommendations]:
+        """
+        Parses a plain text query and generates its item recommendations in one
+        call, saving a model round trip over parse_query + get_recommendations.
+        Returns None if the response doesn't validate.
+        """
+        return await self.cache.get_or_call(
+            "parse_and_recommend", self.model,
+            {"query": normalize_prompt_text(query_str)},
+            lambda: self._parse_and_recommend(query_str),
+            encode=lambda parsed: parsed.model_dump(),
+            decode=lambda parsed: ParsedRecommendations(**parsed),
+            should_cache=lambda parsed: parsed is not None
+        )
 
-        except json.JSONDecodeError:
-            print("Error: Failed to parse JSON from OpenAI response.")
-            return []
-        except Exception as e:
-            print(f"Get Recommendations Error: {e}")
-            return []
+    async def _parse_and_recommend(self, query_str: str) -> Optional[ParsedRecommendations]:
+        prompt = (
+            "You are an expert shopping assistant. Parse the customer's request and recommend specific products for it. "
+            "Return a JSON object with the following structure:\n"
+            "{\n"
+            '  "item_name": "<product the customer is looking for>",\n'
+            '  "type": "<category or null>",\n'
+            '  "price_range": "<budget constraint or null>",\n'
+            '  "number_of_results": <number of products requested, 3 if not specified>,\n'
+            '  "recommendations": [{"item_name": "<specific product name>"}, ...]\n'
+            "}\n\n"
+            "Rules:\n"
+            "1. 'recommendations' must contain EXACTLY 'number_of_results' items\n"
+            "2. Be specific with product names, including brand and model when appropriate\n"
+            "3. Respect the price range when choosing products\n"
+            "4. Return ONLY the JSON object\n\n"
+            f"Customer request: {query_str}"
+        )
+
+        parsed = await self.structured_completion(
+            "parse_and_recommend", ParsedRecommendations,
+            [
+                {"role": "system", "content": "You are an expert shopping assistant."},
+                {"role": "user", "content": prompt},
+            ],
+            check=self.require_items("recommendations")
+        )
+        if parsed is not None:
+            parsed.recommendations = parsed.recommendations[:parsed.number_of_results]
+        return parsed
 
     async def process_web_results(self, items: List[ShoppingItem], purchase_options: Dict) -> List[Recommendation]:
         """
@@ -272,57 +342,19 @@ class OpenAIService:
             # print(f"Options: {options}")
             prompt += f"Item: {item_name}\nPurchase Options:\n{options}\n\n"
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert shopping assistant that returns valid JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3
-            )
-            # response = await self.client.chat.completions.create(
-            #     model=self.reasoning_model,
-            #     messages=[
-            #         {"role": "user", "content": prompt},
-            #     ],
-            # )
-
-            content = response.choices[0].message.content.strip()
-
-            # print(f"Raw Content: {content}")
-
-            content = self.strip_markdown(content)
-            # print(f"Cleaned Content: {content}")
-
-            recommendations = json.loads(content)
-            print(f"Final Recommendations: {recommendations}")
-            # print(recommendations)
-            # Handle both a raw JSON array and a JSON object with key "results"
-            if isinstance(recommendations, dict):
-                if "results" in recommendations and isinstance(recommendations["results"], list):
-                    recommendations = recommendations["results"]
-                else:
-                    raise ValueError("Expected a JSON array or an object with a 'results' key")
-            if not isinstance(recommendations, list):
-                raise ValueError("Expected a JSON array")
-            
-            # Convert each recommendation into a Recommendation model
-            final_recommendations = []
-            for rec in recommendations:
-                try:
-                    # Convert price to string if it's a number
-                    if 'price' in rec and rec['price'] is not None and not isinstance(rec['price'], str):
-                        rec['price'] = str(rec['price'])
-                    final_recommendations.append(Recommendation(**rec))
-                except Exception as e:
-                    print(f"Error validating recommendation: {e}")
-            return final_recommendations
-
-        except Exception as e:
-            print(f"Process Web Results Error: {e}")
+        parsed = await self.structured_completion(
+            "process_web_results", WebResults,
+            [
+                {"role": "system", "content": "You are an expert shopping assistant that returns valid JSON."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.3
+        )
+        if parsed is None:
             return []
+
+        print(f"Final Recommendations: {parsed.results}")
+        return [Recommendation(**selection.model_dump()) for selection in parsed.results]
     
     # Add this method to the PromptedResponse class
 
@@ -346,6 +378,7 @@ class OpenAIService:
         )
 
         try:
+            start = time.perf_counter()
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
@@ -355,6 +388,7 @@ class OpenAIService:
                 max_tokens=50, 
                 temperature=0.7  
             )
+            record_usage(response, "generate_surprise_recommendation", seconds=time.perf_counter() - start)
             
             surprise_item = response.choices[0].message.content.strip()
             
@@ -436,12 +470,14 @@ class OpenAIService:
         """
         
         try:
+            start = time.perf_counter()
             response = await self.client.chat.completions.create(
                 model=self.reasoning_model,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
             )
+            record_usage(response, "generate_user_profile", seconds=time.perf_counter() - start)
             content = self.strip_markdown(response.choices[0].message.content)
             profile_data = json.loads(content)
             return profile_data
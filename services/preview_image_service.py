@@ -0,0 +1,167 @@
+import asyncio
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from utils.ttl_cache import TTLCache
+
+# Meta tags that point at a product's preview image, best first
+IMAGE_META_KEYS = ("og:image", "og:image:url", "og:image:secure_url", "twitter:image", "twitter:image:src")
+
+
+class MetaImageScanner(HTMLParser):
+    """
+    Incrementally scans HTML for a preview image without building a DOM.
+
+    Chunks are fed as they arrive; scanning stops as soon as an Open Graph or
+    Twitter image is found, or when </head> closes with a fallback <img> already
+    seen.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta_images = {}
+        self.first_img = None
+        self.head_closed = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = (attrs.get("property") or attrs.get("name") or "").lower()
+            if key in IMAGE_META_KEYS and attrs.get("content"):
+                self.meta_images.setdefault(key, attrs["content"])
+                if key in IMAGE_META_KEYS[:3]:
+                    self.done = True
+        elif tag == "img" and self.first_img is None:
+            src = dict(attrs).get("src")
+            if src and not src.startswith("data:"):
+                self.first_img = src
+                if self.head_closed:
+                    self.done = True
+        elif tag == "body":
+            self.head_closed = True
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_closed = True
+            if self.meta_images or self.first_img:
+                self.done = True
+
+    def feed(self, data):
+        super().feed(data)
+        return self.done
+
+    def result(self):
+        for key in IMAGE_META_KEYS:
+            if key in self.meta_images:
+                return self.meta_images[key]
+        return self.first_img
+
+
+class PreviewImageResolver:
+    """
+    Finds a preview image for a product page without blocking the event loop.
+
+    Only the start of each page is downloaded (up to `max_bytes`, usually just
+    the <head>) and scanned for og:image. Results are cached per URL, misses are
+    cached too, and domains that keep failing are skipped for a while.
+    """
+
+    def __init__(self, timeout=4.0, connect_timeout=2.0, max_bytes=256 * 1024, chunk_size=16 * 1024,
+                 ttl=6 * 3600, negative_ttl=1800, domain_failure_threshold=3, domain_backoff=900):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=connect_timeout)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.domain_failure_threshold = domain_failure_threshold
+        self.domain_backoff = domain_backoff
+
+        self.cache = TTLCache()
+        self.domain_failures = {}  # domain -> consecutive failures
+        self.blocked_domains = TTLCache(max_size=512)
+        self.in_flight = {}
+        self.session = None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (compatible; PricePalBot/1.0; +https://pricepal.pro)",
+                    "Accept": "text/html,application/xhtml+xml",
+                },
+            )
+        return self.session
+
+    async def resolve(self, url: str):
+        """Returns an absolute image URL for the page, or None."""
+        if not url or not url.startswith(("http://", "https://")):
+            return None
+
+        cached = self.cache.get(url, False)
+        if cached is not False:
+            return cached
+
+        domain = urlparse(url).netloc.lower()
+        if domain in self.blocked_domains:
+            return None
+
+        # Share one fetch between embeds asking for the same page at once
+        task = self.in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, domain))
+            self.in_flight[url] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url, domain):
+        try:
+            image_url = await self._scan(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError) as e:
+            print(f"Preview image lookup failed for {url}: {type(e).__name__} {e}")
+            self._record_failure(domain)
+            self.cache.set(url, None, self.negative_ttl)
+            return None
+
+        self.domain_failures.pop(domain, None)
+        self.cache.set(url, image_url, self.ttl if image_url else self.negative_ttl)
+        return image_url
+
+    async def _scan(self, url):
+        session = self._get_session()
+        async with session.get(url, allow_redirects=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if "html" not in content_type:
+                return None
+
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+            scanner = MetaImageScanner()
+            read = 0
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                read += len(chunk)
+                if scanner.feed(decoder.decode(chunk)) or read >= self.max_bytes:
+                    break
+
+            image_url = scanner.result()
+            # Relative image paths are resolved against the final URL after redirects
+            return urljoin(str(response.url), image_url) if image_url else None
+
+    def _record_failure(self, domain):
+        failures = self.domain_failures.get(domain, 0) + 1
+        self.domain_failures[domain] = failures
+        if failures >= self.domain_failure_threshold:
+            print(f"Skipping preview images from {domain} for {self.domain_backoff}s")
+            self.blocked_domains.set(domain, True, self.domain_backoff)
+            self.domain_failures.pop(domain, None)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+preview_image_resolver = PreviewImageResolver()
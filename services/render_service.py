@@ -0,0 +1,172 @@
+import asyncio
+import importlib
+import io
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Tuple
+
+# Imported inside each worker before its first render
+RENDER_MODULES = ["numpy", "PIL.Image", "PIL.ImageDraw", "matplotlib.figure", "matplotlib.backends.backend_agg"]
+
+PERSONALITY_COLORS = {
+    "Bargain Hunter": (76, 175, 80),     # Green
+    "Luxury Seeker": (156, 39, 176),     # Purple
+    "Practical Buyer": (3, 169, 244),    # Blue
+    "Trendsetter": (255, 87, 34),        # Orange
+    "Tech Enthusiast": (33, 150, 243),   # Light Blue
+    "Fashion Forward": (233, 30, 99),    # Pink
+    "Minimalist": (158, 158, 158),       # Gray
+    "Impulse Shopper": (255, 193, 7),    # Amber
+    "Research Master": (63, 81, 181),    # Indigo
+    "Casual Browser": (139, 195, 74)     # Light Green
+}
+
+
+def draw_personality_image(personality_data):
+    """
+    Creates a visual representation of the user's shopping personality
+    """
+    from PIL import Image, ImageDraw
+
+    # Create a base image (500x200)
+    img = Image.new('RGBA', (500, 200), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(img)
+
+    # Default color if personality not found
+    personality_type = personality_data.get('type', 'Casual Browser')
+    color = PERSONALITY_COLORS.get(personality_type, (100, 100, 100))
+
+    # Draw personality blob (abstract representation)
+    center_x, center_y = 250, 100
+
+    # Draw dots representing traits with randomness for visual interest
+    traits = personality_data.get('traits', [])
+    for i, trait in enumerate(traits[:5]):  # Limit to 5 traits
+        angle = (i / 5) * 2 * math.pi
+        distance = random.randint(50, 80)
+        x = center_x + int(math.cos(angle) * distance)
+        y = center_y + int(math.sin(angle) * distance)
+
+        # Draw connecting line
+        draw.line((center_x, center_y, x, y), fill=color, width=2)
+
+        # Draw circle at trait point
+        circle_size = 20
+        draw.ellipse((x-circle_size/2, y-circle_size/2, x+circle_size/2, y+circle_size/2),
+                     fill=color, outline=(0, 0, 0))
+
+    # Draw central personality circle
+    draw.ellipse((center_x-40, center_y-40, center_x+40, center_y+40),
+                 fill=color, outline=(0, 0, 0, 128))
+
+    return img
+
+
+def render_personality_png(personality_data) -> bytes:
+    """Draws the personality image and returns it as PNG bytes."""
+    buf = io.BytesIO()
+    draw_personality_image(personality_data).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def render_category_chart_png(category_breakdown: Dict[str, float]) -> bytes:
+    """
+    Draws the shopping interests pie chart and returns it as PNG bytes.
+
+    Uses a standalone Figure rather than pyplot so nothing is registered in
+    global state, and the figure is freed as soon as it goes out of scope.
+    """
+    import numpy as np
+    from matplotlib import colormaps
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    categories = list(category_breakdown.keys())
+    values = list(category_breakdown.values())
+
+    fig = Figure(figsize=(8, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    # Color palette
+    colors = colormaps["Pastel1"](np.linspace(0, 1, len(categories)))
+
+    ax.pie(values, labels=categories, autopct='%1.1f%%', startangle=140, colors=colors)
+    ax.axis('equal')
+    ax.set_title('Your Shopping Interests')
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def render_wrapped_images(category_breakdown: Dict[str, float], personality_data: Dict) -> Tuple[bytes, bytes, float]:
+    """Renders both !wrapped images in one worker call, returning their PNG bytes and the render time."""
+    start = time.perf_counter()
+    chart_png = render_category_chart_png(category_breakdown)
+    personality_png = render_personality_png(personality_data)
+    return chart_png, personality_png, time.perf_counter() - start
+
+
+def _import_render_modules():
+    for name in RENDER_MODULES:
+        importlib.import_module(name)
+
+
+class RenderService:
+    """
+    Runs chart and image rendering in a worker pool so a slow render never
+    blocks the event loop.
+
+    Processes are used by default since rendering is CPU bound; workers are
+    spawned rather than forked so they don't inherit the bot's sockets and
+    event loop. A spawned worker re-imports the __main__ script, which is why
+    bot.py only builds the bot (from pricepal.py) under its __main__ guard:
+    workers load this module and the rendering libraries, nothing else.
+    """
+
+    def __init__(self, max_workers=2, use_processes=True):
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            if self.use_processes:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="render")
+        return self.executor
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def warm_up(self):
+        """Starts the workers and imports the rendering libraries in each of them."""
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*[self._run(_import_render_modules) for _ in range(self.max_workers)])
+            print(f"Render workers ready in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"Render worker warm-up failed: {e}")
+
+    async def render_wrapped(self, category_breakdown: Dict[str, float], personality_data: Dict) -> Tuple[bytes, bytes]:
+        """Returns the pie chart and personality image for !wrapped as PNG bytes."""
+        start = time.perf_counter()
+        chart_png, personality_png, render_time = await self._run(
+            render_wrapped_images, category_breakdown, personality_data
+        )
+        print(f"[RENDER] !wrapped images rendered in {render_time:.2f}s ({time.perf_counter() - start:.2f}s including queueing)")
+        return chart_png, personality_png
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -1,12 +1,15 @@
+from typing import Dict, List
 from serpapi import GoogleSearch
+from services.metrics import SERPAPI_CALLS, SERPAPI_SECONDS
+from config import SERPAPI_BASE_URL
 
 class SearchService:
     def __init__(self, api_key: str):
         self.api_key = api_key
-        
-    def search_shopping(self, item_name: str, region: str, price_range: str = None) -> str:
+
+    def search_shopping_results(self, item_name: str, region: str, price_range: str = None) -> List[Dict]:
         """
-        Searches Google Shopping for the given item and returns formatted results.
+        Searches Google Shopping for the given item and returns the raw result dicts.
         """
         q = item_name
         if price_range and price_range.lower() != "none":
@@ -24,19 +27,41 @@ class SearchService:
         }
 
         search = GoogleSearch(params)
-        results = search.get_dict()
-        shopping_results = results.get("shopping_results", [])
-        
+        if SERPAPI_BASE_URL:
+            search.BACKEND = SERPAPI_BASE_URL.rstrip("/")
+        with SERPAPI_SECONDS.time():
+            try:
+                results = search.get_dict()
+            except Exception:
+                SERPAPI_CALLS.inc(status="error")
+                raise
+        SERPAPI_CALLS.inc(status="error" if "error" in results else "ok")
+        return results.get("shopping_results", [])
+
+    @staticmethod
+    def result_link(result: Dict) -> str:
+        return result.get("link") or result.get("product_link", "N/A")
+
+    def format_results(self, shopping_results: List[Dict]) -> str:
+        """
+        Formats shopping results as text for the model to choose from.
+        """
         if not shopping_results:
             return "No shopping results found."
 
         output = []
         for result in shopping_results:
             title = result.get("title", "N/A")
-            link = result.get("link") or result.get("product_link", "N/A")
+            link = self.result_link(result)
             price = result.get("price", "N/A")
             source = result.get("source", "N/A")
             output.append(
                 f"Title: {title}\nLink: {link}\nPrice: {price}\nSource: {source}\n{'-' * 40}"
             )
-        return "\n".join(output) 
\ No newline at end of file
+        return "\n".join(output)
+
+    def search_shopping(self, item_name: str, region: str, price_range: str = None) -> str:
+        """
+        Searches Google Shopping for the given item and returns formatted results.
+        """
+        return self.format_results(self.search_shopping_results(item_name, region, price_range))
@@ -0,0 +1,214 @@
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_MAX_ENTRIES
+)
+
+# Words that don't change what is being shopped for
+STOP_WORDS = {
+    "a", "an", "the", "for", "me", "my", "some", "any", "of", "with", "and", "or", "to", "in",
+    "find", "show", "get", "give", "want", "need", "looking", "good", "best", "please",
+}
+
+_AMOUNT = r"\d[\d,]*(?:\.\d+)?k?"
+_CURRENCY_WORDS = r"(?:dollars?|usd|bucks|euros?|eur|pounds?|gbp)"
+_PRICE_WORDS = r"(?:under|below|less than|cheaper than|up to|at most|over|above|more than|at least|around|about|between|from)"
+
+# Prices written into a query: a price word before any amount ("under 100", "between 50 and 80"),
+# or an amount with a currency sign or word ("$100", "£1.5k-2k", "200 dollars"). Bare numbers
+# stay, since they are usually model numbers ("ps5", "rtx 4090", "iphone 15").
+PRICE_EXPRESSION = re.compile(
+    rf"(?:\b{_PRICE_WORDS}\s*[$£€]?\s?{_AMOUNT}(?:\s?(?:-|to|and)\s?[$£€]?\s?{_AMOUNT})?"
+    rf"|[$£€]\s?{_AMOUNT}(?:\s?(?:-|to)\s?[$£€]?\s?{_AMOUNT})?"
+    rf"|\b{_AMOUNT}(?=\s?(?:[$£€]|{_CURRENCY_WORDS}\b)))"
+    rf"(?:\s?(?:[$£€]|{_CURRENCY_WORDS}\b))?"
+)
+
+
+def normalize_query_words(text: str) -> List[str]:
+    """Lowercases, drops prices, punctuation and stop words, and trims plural endings."""
+    text = PRICE_EXPRESSION.sub(" ", (text or "").lower())
+    words = []
+    for word in re.findall(r"[a-z0-9][a-z0-9\-']*", text):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+# Words that name a specific model rather than describe one; they go along with
+# any word containing a digit ("ps5", "4070", "2")
+VARIANT_WORDS = {"ti", "pro", "max", "plus", "mini", "ultra", "lite", "se", "xl", "super", "air"}
+
+
+def query_text(query: Dict) -> str:
+    return f"{query.get('item_name') or ''} {query.get('type') or ''}"
+
+
+def model_tokens(query: Dict) -> frozenset:
+    """
+    The model numbers, generations and variant names in a query. Queries only
+    match when these are identical, since "rtx 4070 ti" and "rtx 4070" are
+    close as text but different products.
+    """
+    return frozenset(word for word in normalize_query_words(query_text(query))
+                     if word in VARIANT_WORDS or any(char.isdigit() for char in word))
+
+
+def embed_query(query: Dict, dimensions: int = 1024) -> Dict[int, float]:
+    """
+    Embeds a parsed query as a sparse, L2-normalized hashed bag of words and
+    character trigrams. Word order doesn't matter, and trigrams keep small
+    spelling differences close together.
+    """
+    text = query_text(query)
+    vector = {}
+    for word in normalize_query_words(text):
+        features = [(word, 1.0)]
+        padded = f"#{word}#"
+        features += [(padded[i:i + 3], 0.3) for i in range(len(padded) - 2)]
+        for feature, weight in features:
+            index = zlib.crc32(feature.encode()) % dimensions
+            vector[index] = vector.get(index, 0.0) + weight
+
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {index: value / norm for index, value in vector.items()} if norm else {}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+def price_direction(text: str) -> str:
+    """Whether a price range is a ceiling ("max"), a floor ("min") or a target ("around")."""
+    if re.search(r"\b(?:around|about|approx\w*|roughly)\b|~", text):
+        return "around"
+    if re.search(r"\b(?:under|below|less|cheaper|up to|at most|max\w*|within|budget)\b|<", text):
+        return "max"
+    if re.search(r"\b(?:over|above|more|at least|min\w*|from|starting)\b|>|\+", text):
+        return "min"
+    return "around"
+
+
+def price_bucket(price_range) -> Optional[tuple]:
+    """
+    Maps the parsed price range onto its direction and coarse log-scale
+    bounds, so "under 100", "<$100" and "0-100" land together while
+    "over $100" and "around $100" don't. Returns None when no price was given.
+    """
+    if not price_range or str(price_range).strip().lower() in ("none", "null"):
+        return None
+    text = str(price_range).lower()
+    numbers = []
+    for amount, thousands in re.findall(r"(\d[\d,]*(?:\.\d+)?)\s*(k?)", text):
+        value = float(amount.replace(",", "")) * (1000 if thousands else 1)
+        numbers.append(value)
+    direction = price_direction(text)
+    if not numbers:
+        return "text", direction, " ".join(word for word in normalize_query_words(text)
+                                           if not re.fullmatch(_PRICE_WORDS, word))
+
+    def snap(value):
+        return round(math.log2(value) * 4) if value > 0 else 0
+
+    if len(numbers) > 1:
+        low, high = min(numbers), max(numbers)
+        return ("max", snap(high)) if low == 0 else ("between", snap(low), snap(high))
+    return direction, snap(numbers[0])
+
+
+class SemanticQueryCache:
+    """
+    Serves recent recommendations for queries that mean the same thing.
+
+    Parsed queries are embedded locally and compared against recent results
+    for the same region, price bucket, number of results and model tokens
+    (model numbers and variant names must match exactly); a match above
+    `threshold` cosine similarity is returned without calling the model or
+    SerpAPI.
+    """
+
+    def __init__(self, enabled=True, threshold=0.85, ttl=1800, max_entries=512):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (scope, text) -> (expires_at, vector, results)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def scope(query: Dict, region: str):
+        return (
+            (region or "").lower(),
+            price_bucket(query.get("price_range")),
+            query.get("number_of_results") or 3,
+            model_tokens(query),
+        )
+
+    @staticmethod
+    def _copy(results):
+        return [result.model_copy() for result in results]
+
+    def get(self, query: Dict, region: str):
+        """Returns copies of the closest cached results, or None."""
+        if not self.enabled:
+            return None
+        scope = self.scope(query, region)
+        vector = embed_query(query)
+        if not vector:
+            return None
+
+        now = time.monotonic()
+        best_key, best_score = None, self.threshold
+        for key, (expires_at, cached_vector, _) in list(self.entries.items()):
+            if expires_at < now:
+                del self.entries[key]
+                continue
+            if key[0] != scope:
+                continue
+            score = cosine_similarity(vector, cached_vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(best_key)
+        return self._copy(self.entries[best_key][2])
+
+    def set(self, query: Dict, region: str, results):
+        if not self.enabled or not results:
+            return
+        vector = embed_query(query)
+        if not vector:
+            return
+        key = (self.scope(query, region), " ".join(normalize_query_words(query.get("item_name"))))
+        self.entries[key] = (time.monotonic() + self.ttl, vector, self._copy(results))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"semantic query cache: {self.hits}/{total} hits ({hit_rate:.0f}%), "
+                f"{len(self.entries)} entries")
+
+
+semantic_cache = SemanticQueryCache(
+    enabled=SEMANTIC_CACHE_ENABLED,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,108 @@
+import asyncio
+import copy
+import json
+import random
+import re
+from typing import Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def strict_json_schema(model_cls: Type[BaseModel]) -> dict:
+    """
+    Converts a pydantic model's JSON schema into the subset accepted by strict
+    structured outputs: every property is required (optional ones stay
+    nullable), no extra properties, and no defaults.
+    """
+    def tighten(node):
+        if isinstance(node, dict):
+            node.pop("default", None)
+            if "properties" in node:
+                node["required"] = list(node["properties"])
+                node["additionalProperties"] = False
+            for value in node.values():
+                tighten(value)
+        elif isinstance(node, list):
+            for value in node:
+                tighten(value)
+        return node
+
+    return tighten(copy.deepcopy(model_cls.model_json_schema()))
+
+
+def response_format_for(model_cls: Type[BaseModel]) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model_cls.__name__,
+            "strict": True,
+            "schema": strict_json_schema(model_cls),
+        },
+    }
+
+
+def repair_json(content: str) -> str:
+    """Cheap fixes for near-miss JSON: code fences, surrounding prose and trailing commas."""
+    content = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", content.strip())
+    start, end = content.find("{"), content.rfind("}")
+    if start != -1 and end > start:
+        content = content[start:end + 1]
+    return re.sub(r",\s*([}\]])", r"\1", content)
+
+
+def validate_output(model_cls: Type[Model], content: str) -> Tuple[Model, bool]:
+    """
+    Validates a model response against `model_cls`, trying a local repair
+    before giving up. Returns the parsed model and whether it needed repair.
+    """
+    try:
+        return model_cls.model_validate_json(content), False
+    except ValidationError:
+        repaired = repair_json(content)
+        if repaired == content:
+            raise
+        return model_cls.model_validate(json.loads(repaired)), True
+
+
+async def retry_delay(attempt: int, base: float = 0.5, cap: float = 4.0):
+    """Exponential backoff with full jitter so retries from many users don't line up."""
+    await asyncio.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+
+class StructuredOutputStats:
+    """Counts structured calls per method: attempts, local repairs and calls that failed after every retry."""
+
+    def __init__(self):
+        self.stats = {}
+
+    def _method(self, method):
+        return self.stats.setdefault(method, {"calls": 0, "attempts": 0, "repaired": 0, "failed": 0})
+
+    def record(self, method: str, attempts: int, repaired: bool = False, failed: bool = False):
+        stats = self._method(method)
+        stats["calls"] += 1
+        stats["attempts"] += attempts
+        stats["repaired"] += int(repaired)
+        stats["failed"] += int(failed)
+
+    def failure_rate(self, method: str) -> Optional[float]:
+        stats = self.stats.get(method)
+        if not stats or not stats["calls"]:
+            return None
+        return stats["failed"] / stats["calls"]
+
+    def report(self) -> str:
+        if not self.stats:
+            return "No structured model calls yet."
+        lines = []
+        for method, stats in sorted(self.stats.items()):
+            lines.append(
+                f"{method}: {stats['failed']}/{stats['calls']} failed ({self.failure_rate(method) * 100:.1f}%), "
+                f"{stats['attempts'] - stats['calls']} retries, {stats['repaired']} repaired"
+            )
+        return "\n".join(lines)
+
+
+structured_output_stats = StructuredOutputStats()
@@ -0,0 +1,143 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import TRACING_EXPORTER, TRACING_FILE
+
+# Attributes copied from a span to its children so every stage can be filtered by them
+INHERITED_ATTRIBUTES = ("command", "guild_id")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed stage. Field names follow the OpenTelemetry span model
+    (hex trace/span ids, nanosecond timestamps, attributes, status).
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_time", "end_time", "attributes", "status")
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.attributes = {}
+        if parent:
+            for key in INHERITED_ATTRIBUTES:
+                if key in parent.attributes:
+                    self.attributes[key] = parent.attributes[key]
+        self.attributes.update(attributes or {})
+        self.status = "OK"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return ((self.end_time or time.time_ns()) - self.start_time) / 1e6
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time,
+            "end_time_unix_nano": self.end_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+class _OtelSpan:
+    """Adapts an OpenTelemetry span to the same small interface."""
+
+    def __init__(self, span):
+        self.span = span
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.span.set_attribute(key, value)
+
+
+class Tracer:
+    """
+    Creates spans around pipeline stages and hands finished ones to an exporter:
+
+    - "console" prints one line per span
+    - "json" appends one JSON object per span to `path`
+    - "otel" delegates to the OpenTelemetry API, so any configured SDK exporter applies
+
+    With no exporter, spans are no-ops.
+    """
+
+    def __init__(self, exporter=None, path="traces.jsonl"):
+        self.exporter = (exporter or "").lower() or None
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.otel_tracer = None
+        if self.exporter == "otel":
+            try:
+                from opentelemetry import trace  # Optional dependency
+                self.otel_tracer = trace.get_tracer("pricepal")
+            except ImportError:
+                print("Tracing: opentelemetry is not installed, writing spans to the console instead")
+                self.exporter = "console"
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Times the enclosed block as a child of the current span."""
+        if not self.enabled:
+            yield _NoopSpan()
+            return
+
+        if self.otel_tracer is not None:
+            attributes = {key: value for key, value in attributes.items() if value is not None}
+            with self.otel_tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+                yield _OtelSpan(otel_span)
+            return
+
+        span = Span(name, parent=_current_span.get(), attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.set_attribute("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time_ns()
+            self.export(span)
+
+    def export(self, span):
+        if self.exporter == "console":
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            print(f"[TRACE] {span.trace_id[:8]} {span.name} {span.duration_ms:.1f}ms {span.status} {attributes}")
+        elif self.exporter == "json":
+            line = json.dumps(span.to_dict(), default=str)
+            with self.lock:
+                if self.file is None:
+                    self.file = open(self.path, "a", buffering=1)
+                self.file.write(line + "\n")
+
+
+tracer = Tracer(exporter=TRACING_EXPORTER, path=TRACING_FILE)
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from config import LLM_TOKEN_PRICES, USAGE_LEDGER_ENABLED, USAGE_FLUSH_INTERVAL, USAGE_FLUSH_BATCH
+from db.repositories import insert_llm_usage, get_llm_usage_summary, USAGE_GROUPS
+from services.metrics import registry
+
+LLM_COST = registry.counter("pricepal_llm_cost_usd_total", "Estimated model spend per command", ["command"])
+
+
+def token_price(model):
+    """(input, output) USD per million tokens for the longest matching model name prefix, or None."""
+    matches = [prefix for prefix in LLM_TOKEN_PRICES if model and model.startswith(prefix)]
+    return LLM_TOKEN_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens) -> float:
+    price = token_price(model)
+    if price is None:
+        return 0.0
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+class UsageLedger:
+    """
+    Totals model usage per (user, guild, command, method, model) in memory and
+    writes the totals to the llm_usage table every `flush_interval` seconds, or
+    sooner once `batch_size` keys are pending. Writes run in a worker thread so
+    the event loop never waits on the database; a failed write keeps its
+    totals for the next flush, and cancelling a flush never cancels a write
+    already under way.
+    """
+
+    def __init__(self, enabled=True, flush_interval=30.0, batch_size=200):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending = {}
+        self.session_factory = None
+        self.task = None
+        self.wakeup = None
+        self.writes = set()
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def start(self, loop, session_factory):
+        """Starts the flush loop. Safe to call on every on_ready."""
+        if not self.enabled or self.task is not None:
+            return
+        self.session_factory = session_factory
+        self.wakeup = asyncio.Event()
+        self.task = loop.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stops the flush loop, waits for writes in progress and flushes what is left."""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.writes:
+            await asyncio.wait(set(self.writes))
+        await self.flush()
+
+    def record(self, method, model, prompt_tokens, completion_tokens, seconds=0.0,
+               user_id=None, guild_id=None, command=None):
+        command = command or "unknown"
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        LLM_COST.inc(cost, command=command)
+        if self.task is None:
+            return  # Nowhere to write it
+
+        key = (str(user_id) if user_id else None, str(guild_id) if guild_id else None, command, method, model)
+        totals = self.pending.get(key)
+        if totals is None:
+            totals = self.pending[key] = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                          "seconds": 0.0, "cost_usd": 0.0}
+        totals["calls"] += 1
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["seconds"] += seconds
+        totals["cost_usd"] += cost
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Writes every pending total in one batch."""
+        if not self.pending or self.session_factory is None:
+            return
+        batch, self.pending = self.pending, {}
+        rows = [
+            {"discord_user_id": user_id, "guild_id": guild_id, "command": command, "method": method,
+             "model": model, **totals}
+            for (user_id, guild_id, command, method, model), totals in batch.items()
+        ]
+        write = asyncio.ensure_future(asyncio.to_thread(self._write, rows))
+        self.writes.add(write)
+        write.add_done_callback(lambda done: self._write_done(done, batch))
+        # wait() rather than await, so cancelling the flush leaves the write and its accounting running
+        await asyncio.wait({write})
+
+    def _write_done(self, write, batch):
+        self.writes.discard(write)
+        error = asyncio.CancelledError() if write.cancelled() else write.exception()
+        if error is None:
+            self.flushed_rows += len(batch)
+            return
+        self.failed_flushes += 1
+        print(f"Usage ledger flush failed, keeping {len(batch)} rows for the next one: {error}")
+        for key, totals in batch.items():
+            current = self.pending.setdefault(key, dict.fromkeys(totals, 0))
+            for field, value in totals.items():
+                current[field] += value
+
+    def _write(self, rows):
+        db = self.session_factory()
+        try:
+            insert_llm_usage(db, rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _summary(self, since, group_by, limit):
+        db = self.session_factory()
+        try:
+            return get_llm_usage_summary(db, since, group_by=group_by, limit=limit)
+        finally:
+            db.close()
+
+    async def report(self, days=7, group_by="command", limit=10) -> str:
+        """Spend over the last `days` days, costliest first, including usage not yet flushed."""
+        if group_by not in USAGE_GROUPS:
+            return f"Unknown grouping '{group_by}'. Use one of: {', '.join(USAGE_GROUPS)}."
+        if self.session_factory is None:
+            return "Usage accounting is off. Set `USAGE_LEDGER_ENABLED=1` to record model spend."
+        await self.flush()
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        rows = await asyncio.to_thread(self._summary, since, group_by, limit)
+        if not rows:
+            return f"No model usage in the last {days} days."
+
+        lines = [f"Model spend over the last {days} days by {group_by}:"]
+        for row in rows:
+            calls = row.calls or 0
+            tokens = (row.prompt_tokens or 0) + (row.completion_tokens or 0)
+            seconds = float(row.seconds or 0)
+            lines.append(
+                f"{str(row.key or '-')[:24]:<25}${float(row.cost_usd or 0):>9.4f}{calls:>8} calls"
+                f"{tokens:>10} tokens{seconds / calls if calls else 0:>7.2f}s/call"
+            )
+        if self.failed_flushes:
+            lines.append(f"{self.failed_flushes} flushes failed; their totals are retried on the next flush.")
+        return "\n".join(lines)
+
+
+usage_ledger = UsageLedger(enabled=USAGE_LEDGER_ENABLED, flush_interval=USAGE_FLUSH_INTERVAL, batch_size=USAGE_FLUSH_BATCH)
@@ -0,0 +1,70 @@
+# semantic_cache_test.py
+# Run with `python testing/semantic_cache_test.py` or pytest from the repo root.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.semantic_cache import SemanticQueryCache
+
+# Different products whose names are close enough as text to clear the similarity threshold
+DIFFERENT_PRODUCTS = [
+    ("rtx 4070 ti", "rtx 4070"),
+    ("airpods pro 2", "airpods pro"),
+    ("ps5 controller", "ps4 controller"),
+    ("rtx 4090", "rtx 3060"),
+    ("iphone 15 case", "iphone 12 case"),
+    ("macbook air", "macbook"),
+]
+
+# Rewordings of the same product that should still be served from the cache
+SAME_PRODUCTS = [
+    ("wireless headphones", "headphones wireless"),
+    ("rtx 4070 ti graphics card", "rtx 4070 ti graphics cards"),
+    ("airpods pro 2", "airpods pro 2 under $200"),
+]
+
+
+class CachedResult:
+    def __init__(self, name):
+        self.name = name
+
+    def model_copy(self):
+        return CachedResult(self.name)
+
+
+def lookup(cached_name, query_name, price_range=None):
+    cache = SemanticQueryCache(enabled=True, threshold=0.85)
+    cache.set({"item_name": cached_name, "price_range": price_range}, "us", [CachedResult(cached_name)])
+    return cache.get({"item_name": query_name, "price_range": price_range}, "us")
+
+
+def test_model_numbers_and_variants_never_match():
+    for cached_name, query_name in DIFFERENT_PRODUCTS:
+        assert lookup(cached_name, query_name) is None, (cached_name, query_name)
+        assert lookup(query_name, cached_name) is None, (query_name, cached_name)
+
+
+def test_rewordings_still_match():
+    for cached_name, query_name in SAME_PRODUCTS:
+        hit = lookup(cached_name, query_name)
+        assert hit is not None and hit[0].name == cached_name, (cached_name, query_name)
+
+
+def test_price_direction_is_kept():
+    cache = SemanticQueryCache(enabled=True, threshold=0.85)
+    cache.set({"item_name": "gaming mouse", "price_range": "under $100"}, "us", [CachedResult("cheap")])
+    assert cache.get({"item_name": "gaming mouse", "price_range": "<$100"}, "us") is not None
+    assert cache.get({"item_name": "gaming mouse", "price_range": "over $100"}, "us") is None
+
+
+def main():
+    for test in (test_model_numbers_and_variants_never_match, test_rewordings_still_match,
+                 test_price_direction_is_kept):
+        test()
+        print("passed:", test.__name__)
+
+
+if __name__ == "__main__":
+    main()
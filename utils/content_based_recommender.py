@@ -1,13 +1,13 @@
-import gensim
-import numpy as np
-import pandas as pd
-from sklearn.manifold import TSNE
-import matplotlib.pyplot as plt
-from sklearn.metrics.pairwise import cosine_similarity
 import json
+from utils.lazy_imports import lazy_import
 from db.repositories import get_wishlist_items_for_user, get_recent_queries_by_user
 from db.models import RecommendedItem
 
+# Training and plotting libraries are heavy and only used offline, so load them on first use
+gensim = lazy_import("gensim")
+np = lazy_import("numpy")
+plt = lazy_import("matplotlib.pyplot")
+
 class ContentBasedRecommender:
     def __init__(self, db_session):
         self.db = db_session
@@ -132,6 +132,8 @@ class ContentBasedRecommender:
         # Create user profile
         user_profile = self.create_user_profile(user_id)
         
+        from sklearn.metrics.pairwise import cosine_similarity
+
         # Calculate similarity to all items
         similarities = {}
         for item_id, item_vec in self.item_embeddings.items():
@@ -164,6 +166,8 @@ class ContentBasedRecommender:
     
     def visualize_embeddings(self, highlight_items=None):
         """Create a visualization of item embeddings using t-SNE"""
+        from sklearn.manifold import TSNE
+
         # Extract item vectors and IDs
         item_ids = list(self.item_embeddings.keys())
         item_vecs = np.array([self.item_embeddings[item_id] for item_id in item_ids])
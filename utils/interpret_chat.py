@@ -1,13 +1,12 @@
-from openai import AsyncOpenAI
-from config import OPENAI_API_KEY, OPENAI_MODEL
+from config import OPENAI_MODEL
+from services.openai_client import get_openai_client
+from services.llm_usage import record_usage
 
 import json
+import time
 
 
-
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-async def interpret_chat(messages):
+async def interpret_chat(messages, client=None):
     """
     Input: List of recent messages (strings)
     Output: Parsed query as a dictionary:
@@ -60,6 +59,8 @@ async def interpret_chat(messages):
     """
 
     try:
+        client = client or get_openai_client()
+        start = time.perf_counter()
         response = await client.chat.completions.create(model=OPENAI_MODEL,
         messages=[
             {"role": "system", "content": "You are a helpful shopping assistant."},
@@ -67,6 +68,7 @@ async def interpret_chat(messages):
         ],
         response_format={"type": "json_object"},
         temperature=0.7)
+        record_usage(response, "interpret_chat", seconds=time.perf_counter() - start)
 
         result_text = response.choices[0].message.content.strip()
         query = json.loads(result_text)
@@ -0,0 +1,43 @@
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    Stands in for a module until one of its attributes is used, then imports
+    the real module and forwards everything to it.
+
+    Heavy libraries (matplotlib, numpy, PIL, gensim, sklearn) are only needed
+    by a few commands, so importing them up front slows startup and inflates
+    the bot's baseline memory for nothing.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns the module if it is already imported, otherwise a lazy stand-in."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
@@ -2,17 +2,19 @@ import asyncio
 from sqlalchemy.orm import Session
 from db.repositories import get_recent_queries_by_user, get_wishlist_items_for_user, delete_all_recommendations_for_user, insert_recommendation_for_user
 from services.openai_service import OpenAIService
+from services.llm_usage import record_usage, set_usage_attribution
 from prompted_response import PromptedResponse
 from config import OPENAI_API_KEY
 import json
+import time
 from datetime import datetime
 import traceback
 
 
 class RecommendationService:
-    def __init__(self):
-        self.openai_service = OpenAIService(OPENAI_API_KEY)
-        self.prompted_response = PromptedResponse()
+    def __init__(self, openai_service=None, prompted_response=None):
+        self.openai_service = openai_service or OpenAIService(OPENAI_API_KEY)
+        self.prompted_response = prompted_response or PromptedResponse(openai_service=self.openai_service)
         
     async def update_recommendations(self, db: Session, user_id: str):
         """
@@ -22,6 +24,8 @@ class RecommendationService:
         This runs in the background and doesn't block the main bot functionality.
         Note: Caller is responsible for managing the db session (closing it).
         """
+        # Runs as its own task, so this only charges the refresh's model calls to it
+        set_usage_attribution(command="recommendation_refresh")
         try:
             print(f"[RECOMMENDATION SERVICE] Started for user {user_id} at {datetime.now()}")
             
@@ -65,12 +69,14 @@ class RecommendationService:
             """
             
             # Call OpenAI to get recommendations
+            start = time.perf_counter()
             response = await self.openai_service.client.chat.completions.create(
                 model=self.openai_service.reasoning_model,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
             )
+            record_usage(response, "update_recommendations", seconds=time.perf_counter() - start)
             
             content = self.openai_service.strip_markdown(response.choices[0].message.content)
             recommendation_data = json.loads(content)
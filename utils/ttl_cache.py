@@ -0,0 +1,38 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A small LRU cache whose entries expire after their own TTL."""
+
+    def __init__(self, max_size=2048):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def __contains__(self, key):
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def set(self, key, value, ttl):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,57 +1,50 @@
+import asyncio
+import weakref
+from collections import namedtuple
+from typing import List
 import discord
 from discord.ui import View
 from discord.ext import commands
-from views.shopping_item_view import ShoppingItemView
-import requests
-from bs4 import BeautifulSoup
-import requests
-from io import BytesIO
-from PIL import Image
+from views.shopping_item_view import ShoppingItemView, ShoppingItemsView
+from services.preview_image_service import preview_image_resolver
+from config import PREVIEW_IMAGE_SCRAPING
+from services.tracing import tracer
 
+# Everything needed to post one recommended item
+EmbedItem = namedtuple("EmbedItem", ["item_name", "price", "link", "query_id", "rec_item_id", "image_url"])
 
-def get_preview_image(url):
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        soup = BeautifulSoup(response.content, 'html.parser')
+# One lock per channel keeps batches from different commands from interleaving.
+# Locks are dropped once no sender holds a reference to them.
+_channel_locks = weakref.WeakValueDictionary()
 
-        # Try to find Open Graph image tag first
-        og_image = soup.find('meta', property='og:image')
-        if og_image and og_image['content']:
-            return og_image['content']
 
-        # If no Open Graph image, try to find a regular image tag
-        image_tag = soup.find('img')
-        if image_tag and image_tag.has_attr('src'):
-                # Handle relative URLs
-            if image_tag['src'].startswith('http'):
-                image_url = image_tag['src']
-            else:
-                from urllib.parse import urljoin
-                image_url = urljoin(url, image_tag['src'])
-            return image_url
+def channel_send_lock(destination) -> asyncio.Lock:
+    channel = getattr(destination, "channel", destination)
+    lock = _channel_locks.get(channel.id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _channel_locks[channel.id] = lock
+    return lock
 
-        return None
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL: {e}")
-        return None
+async def get_preview_image(url):
+    """Looks up a preview image for the product page without blocking the event loop."""
+    try:
+        return await preview_image_resolver.resolve(url)
     except Exception as e:
-            print(f"An error occurred: {e}")
-            return None
+        print(f"An error occurred: {e}")
+        return None
 
 
-async def recommended_item_embed(ctx: commands.Context | None, message: discord.Message | None,
-                                 item_name: str, price: str, link: str,
-                                 query_id: str, rec_item_id: str, image_url: str = None):
+async def build_item_embed(item_name: str, price: str, link: str, image_url: str = None,
+                           position: int = None) -> discord.Embed:
     """
-    Sends an embed with a shopping item view.
+    Builds the embed for one shopping item. `position` numbers the title so it
+    matches its buttons when several items share a message.
     """
-    
-    print("Beginning recommended item embed")
     # Create an embed
     embed = discord.Embed(
-        title=item_name,
+        title=f"#{position} {item_name}" if position else item_name,
         url=link,  # Make the title clickable
         description=f"**Price:** {price}",  # Move price to description for cleaner look
         color=discord.Color.brand_green()  # Use a more appealing color
@@ -61,27 +54,68 @@ async def recommended_item_embed(ctx: commands.Context | None, message: discord.
     formatted_link = f"[Click to view item]({link})"
     embed.add_field(name="Product Link", value=formatted_link, inline=False)
     
-    # Try to get image URL from the link if no image_url is provided
-    print("Getting image from URL")
-    if not image_url and link:
-        image_url = get_preview_image(link)
+    # Fall back to scraping the product page only if there's no search thumbnail and it's enabled
+    if not image_url and link and PREVIEW_IMAGE_SCRAPING:
+        print("Getting image from URL")
+        with tracer.span("image_lookup") as span:
+            image_url = await get_preview_image(link)
+            span.set_attribute("found", image_url is not None)
         print(f"Image URL: {image_url}")
     
     # Add image to embed if image_url is available
-    print("Adding image to embed")
     if image_url:
         embed.set_image(url=image_url)
     
-    
     # Add timestamp for freshness
     embed.timestamp = discord.utils.utcnow()
     
     embed.set_footer(text="Visit pricepal.pro for your personalized recommendations and wishlist.")
+    return embed
+
 
+async def recommended_item_embed(ctx: commands.Context | None, message: discord.Message | None,
+                                 item_name: str, price: str, link: str,
+                                 query_id: str, rec_item_id: str, image_url: str = None):
+    """
+    Sends an embed with a shopping item view.
+    """
+    embed = await build_item_embed(item_name, price, link, image_url)
     view = ShoppingItemView(query_id, rec_item_id)
     
     # Send the embed with the buttons
-    if ctx:
-        await ctx.send(embed=embed, view=view)
-    else:
-        await message.channel.send(embed=embed, view=view)
\ No newline at end of file
+    destination = ctx if ctx else message.channel
+    with tracer.span("embed.send", items=1, messages=1):
+        async with channel_send_lock(destination):
+            await destination.send(embed=embed, view=view)
+
+
+async def send_recommended_items(destination, items: List[EmbedItem]):
+    """
+    Sends several shopping items using as few messages as possible.
+
+    All embeds (and any image lookups) are prepared concurrently, then grouped
+    up to five per message with a numbered row of buttons for each item.
+    Messages for a channel are sent one after another; discord.py waits on the
+    channel's rate-limit bucket itself when it runs low.
+    """
+    if not items:
+        return
+
+    batched = len(items) > 1
+    with tracer.span("embed.build", items=len(items)):
+        embeds = await asyncio.gather(*[
+            build_item_embed(item.item_name, item.price, item.link, item.image_url,
+                             position=i + 1 if batched else None)
+            for i, item in enumerate(items)
+        ])
+
+    size = ShoppingItemsView.MAX_ITEMS
+    with tracer.span("embed.send", items=len(items), messages=-(-len(items) // size)):
+        async with channel_send_lock(destination):
+            for start in range(0, len(items), size):
+                group = items[start:start + size]
+                if not batched:
+                    view = ShoppingItemView(group[0].query_id, group[0].rec_item_id)
+                else:
+                    view = ShoppingItemsView([(item.query_id, item.rec_item_id) for item in group], first_number=start + 1)
+                await destination.send(embeds=embeds[start:start + size], view=view)
@@ -3,99 +3,152 @@ import discord
 from db.database import get_db_session
 from db.repositories import create_reaction
 
-class ShoppingItemView(View):
+# Confirmation and failure messages for each reaction type
+REACTION_MESSAGES = {
+    "wishlist": (
+        "Added to your wishlist! Use `!wishlist` to view your saved items.",
+        "Something went wrong adding to your wishlist. Please try again."
+    ),
+    "dislike": (
+        "You disliked this item. We'll use this to improve your recommendations!",
+        "Something went wrong recording your dislike. Please try again."
+    ),
+}
+
+
+async def handle_reaction(interaction: discord.Interaction, query_id: str, rec_item_id: str, reaction_type: str):
+    """Records a wishlist/dislike reaction from a button click and confirms it to the user."""
+    confirmation, failure = REACTION_MESSAGES[reaction_type]
+    try:
+        # Defer the response right away to buy more time
+        await interaction.response.defer(ephemeral=True)
+
+        # Get a fresh connection for this operation
+        db = get_db_session()
+        try:
+            # Create the reaction in database
+            create_reaction(db, query_id=query_id, recommended_item_id=rec_item_id, reaction_type=reaction_type)
+            db.commit()  # Explicitly commit changes
+
+            # Send the confirmation message
+            await interaction.followup.send(confirmation, ephemeral=True)
+            print(f"Recorded {reaction_type}: {rec_item_id}")
+        except Exception as e:
+            db.rollback()
+            print(f"Database error in {reaction_type}: {e}")
+            await interaction.followup.send(failure, ephemeral=True)
+        finally:
+            db.close()  # Always close the connection
+
+    except discord.errors.NotFound:  # Handle interaction timeout
+        # Interaction has expired, can't respond to it
+        print(f"Interaction timed out for {reaction_type} on item {rec_item_id}")
+    except discord.errors.DiscordServerError:
+        # Server error from Discord
+        try:
+            await interaction.followup.send("Discord server error. Please try again later.", ephemeral=True)
+        except:
+            pass
+    except discord.errors.HTTPException as e:
+        print(f"HTTP Exception in {reaction_type} button: {e.code} - {e.text}")
+        try:
+            if e.code == 10062:  # Unknown interaction error
+                pass  # Can't respond to timed out interaction
+            else:
+                await interaction.followup.send(f"Discord error: {e.text}", ephemeral=True)
+        except:
+            pass
+    except Exception as e:
+        print(f"{reaction_type.capitalize()} error: {e}")
+
+
+class ReactionButton(discord.ui.DynamicItem[discord.ui.Button], template=r"pp:(?P<reaction_type>wishlist|dislike):(?P<query_id>[0-9a-f-]+):(?P<rec_item_id>[0-9a-f-]+|none)"):
+    """
+    A wishlist/dislike button whose item ids live in its custom_id.
+
+    One registered handler decodes the ids from any click, so nothing is kept
+    in memory per posted item and the buttons keep working after a restart.
+    """
+
+    def __init__(self, reaction_type: str, query_id, rec_item_id, label: str = None,
+                 style: discord.ButtonStyle = discord.ButtonStyle.secondary, emoji: str = None, row: int = None):
+        self.reaction_type = reaction_type
+        self.query_id = str(query_id)
+        self.rec_item_id = str(rec_item_id) if rec_item_id else None
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                emoji=emoji,
+                row=row,
+                custom_id=f"pp:{reaction_type}:{self.query_id}:{self.rec_item_id or 'none'}"
+            ),
+            row=row
+        )
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match, /):
+        rec_item_id = match["rec_item_id"]
+        return cls(
+            match["reaction_type"],
+            match["query_id"],
+            None if rec_item_id == "none" else rec_item_id,
+            label=item.label,
+            style=item.style,
+            emoji=item.emoji,
+            row=item.row
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_reaction(interaction, self.query_id, self.rec_item_id, self.reaction_type)
+
+
+class StatelessView(View):
+    """
+    A view made only of ReactionButtons. It is stopped straight away so
+    discord.py never stores it; clicks are routed by the registered dynamic
+    item instead.
+    """
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    def finish(self):
+        self.stop()
+        return self
+
+
+class ShoppingItemView(StatelessView):
     """
     A view for a shopping item.
     """
-    
+
     def __init__(self, query_id: str, rec_item_id: str):
-        super().__init__(timeout=None)  
+        super().__init__()
         self.query_id = query_id
         self.rec_item_id = rec_item_id
-        
-    @discord.ui.button(label="Add to Wishlist", style=discord.ButtonStyle.success, emoji="❤️")
-    async def on_wishlist_click(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            # Defer the response right away to buy more time
-            await interaction.response.defer(ephemeral=True)
-            
-            # Get a fresh connection for this operation
-            db = get_db_session()
-            try:
-                # Create the reaction in database
-                create_reaction(db, query_id=self.query_id, recommended_item_id=self.rec_item_id, reaction_type="wishlist")
-                db.commit()  # Explicitly commit changes
-                
-                # Send the confirmation message
-                await interaction.followup.send("Added to your wishlist! Use `!wishlist` to view your saved items.", ephemeral=True)
-                print(f"Added to wishlist: {self.rec_item_id}")
-            except Exception as e:
-                db.rollback()
-                print(f"Database error in wishlist: {e}")
-                await interaction.followup.send("Something went wrong adding to your wishlist. Please try again.", ephemeral=True)
-            finally:
-                db.close()  # Always close the connection
-            
-        except discord.errors.NotFound:  # Handle interaction timeout
-            # Interaction has expired, can't respond to it
-            print(f"Interaction timed out for wishlist item {self.rec_item_id}")
-        except discord.errors.DiscordServerError:
-            # Server error from Discord
-            try:
-                await interaction.followup.send("Discord server error. Please try again later.", ephemeral=True)
-            except:
-                pass
-        except discord.errors.HTTPException as e:
-            print(f"HTTP Exception in wishlist button: {e.code} - {e.text}")
-            try:
-                if e.code == 10062:  # Unknown interaction error
-                    pass  # Can't respond to timed out interaction
-                else:
-                    await interaction.followup.send(f"Discord error: {e.text}", ephemeral=True)
-            except:
-                pass
-        except Exception as e:
-            print(f"Wishlist error: {e}")
+        self.add_item(ReactionButton("wishlist", query_id, rec_item_id, label="Add to Wishlist",
+                                     style=discord.ButtonStyle.success, emoji="❤️"))
+        self.add_item(ReactionButton("dislike", query_id, rec_item_id, label="Dislike",
+                                     style=discord.ButtonStyle.danger, emoji="👎"))
+        self.finish()
 
-    @discord.ui.button(label="Dislike", style=discord.ButtonStyle.danger, emoji="👎")
-    async def on_dislike_click(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            # Defer the response right away to buy more time
-            await interaction.response.defer(ephemeral=True)
-            
-            # Get a fresh connection for this operation
-            db = get_db_session()
-            try:
-                # Create the reaction in database
-                create_reaction(db, query_id=self.query_id, recommended_item_id=self.rec_item_id, reaction_type="dislike")
-                db.commit()  # Explicitly commit changes
-                
-                # Send the confirmation message
-                await interaction.followup.send("You disliked this item. We'll use this to improve your recommendations!", ephemeral=True)
-            except Exception as e:
-                db.rollback()
-                print(f"Database error in dislike: {e}")
-                await interaction.followup.send("Something went wrong recording your dislike. Please try again.", ephemeral=True)
-            finally:
-                db.close()  # Always close the connection
-            
-        except discord.errors.NotFound:  # Handle interaction timeout
-            # Interaction has expired, can't respond to it
-            print(f"Interaction timed out for dislike on item {self.rec_item_id}")
-        except discord.errors.DiscordServerError:
-            # Server error from Discord
-            try:
-                await interaction.followup.send("Discord server error. Please try again later.", ephemeral=True)
-            except:
-                pass
-        except discord.errors.HTTPException as e:
-            print(f"HTTP Exception in dislike button: {e.code} - {e.text}")
-            try:
-                if e.code == 10062:  # Unknown interaction error
-                    pass  # Can't respond to timed out interaction
-                else:
-                    await interaction.followup.send(f"Discord error: {e.text}", ephemeral=True)
-            except:
-                pass
-        except Exception as e:
-            print(f"Dislike error: {e}")
\ No newline at end of file
+
+class ShoppingItemsView(StatelessView):
+    """
+    A view for several shopping items sent in one message, with one row of
+    buttons per item numbered to match the embeds.
+    """
+
+    # Discord allows at most 5 action rows per message
+    MAX_ITEMS = 5
+
+    def __init__(self, items, first_number=1):
+        super().__init__()
+        for row, (query_id, rec_item_id) in enumerate(items[:self.MAX_ITEMS]):
+            number = first_number + row
+            self.add_item(ReactionButton("wishlist", query_id, rec_item_id, label=f"Wishlist #{number}",
+                                         style=discord.ButtonStyle.success, emoji="❤️", row=row))
+            self.add_item(ReactionButton("dislike", query_id, rec_item_id, label=f"Dislike #{number}",
+                                         style=discord.ButtonStyle.danger, emoji="👎", row=row))
+        self.finish()
@@ -0,0 +1,146 @@
+import discord
+from discord.ui import View
+from typing import Callable
+from sqlalchemy.orm import Session
+from db.repositories import get_wishlist_page_for_user, count_wishlist_items_for_user
+
+# Discord rejects embeds over these limits with a 400
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+EMBED_TOTAL_LIMIT = 6000
+
+
+class WishlistView(View):
+    """
+    A single message showing a user's wishlist one page at a time.
+
+    Only the requested page is loaded from the database; the first and last
+    items of the current page are the keyset cursors for the previous and next
+    pages.
+    """
+
+    def __init__(self, db_getter: Callable[[], Session], user_id, owner_id: int, page_size: int = 10):
+        super().__init__(timeout=600)
+        self.get_db = db_getter
+        self.user_id = user_id
+        self.owner_id = owner_id
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+        self.items = []
+        self.has_next = False
+        self.message = None
+
+    def load_first_page(self):
+        """Loads the total count and the newest page. Returns False if the wishlist is empty."""
+        db = self.get_db()
+        try:
+            self.total = count_wishlist_items_for_user(db, self.user_id)
+            if not self.total:
+                return False
+            self.items, self.has_next = get_wishlist_page_for_user(db, self.user_id, self.page_size)
+            return True
+        finally:
+            db.close()
+
+    def _load_page(self, backwards: bool):
+        cursor_item = self.items[0] if backwards else self.items[-1]
+        db = self.get_db()
+        try:
+            items, has_more = get_wishlist_page_for_user(
+                db, self.user_id, self.page_size,
+                cursor=(cursor_item.created_at, cursor_item.id),
+                backwards=backwards
+            )
+        finally:
+            db.close()
+
+        if not items:
+            return
+        self.items = items
+        if backwards:
+            self.page -= 1
+            self.has_next = True
+        else:
+            self.page += 1
+            self.has_next = has_more
+
+    def build_embed(self) -> discord.Embed:
+        pages = max(1, -(-self.total // self.page_size))
+        embed = discord.Embed(
+            title=f"❤️ Your Wishlist ({self.total} items)",
+            color=discord.Color.brand_green()
+        )
+
+        footer = f"Page {self.page + 1} of {pages} • Visit pricepal.pro for your personalized recommendations and wishlist."
+        # Everything but the fields counts toward the total too
+        budget = EMBED_TOTAL_LIMIT - len(embed.title) - len(footer)
+
+        first_number = self.page * self.page_size + 1
+        names = []
+        for number, item in enumerate(self.items, first_number):
+            price_text = f" - ${item.price}" if item.price and float(item.price) > 0 else ""
+            prefix = f"{number}. "
+            item_name = item.item_name or ""
+            room = FIELD_NAME_LIMIT - len(prefix) - len(price_text)
+            if len(item_name) > room:
+                item_name = item_name[:room - 1] + "…"
+            names.append(f"{prefix}{item_name}{price_text}")
+
+        # Every item keeps its field; links that would overflow the embed are dropped, last items first
+        no_link = "Link too long to show here"
+        budget -= sum(len(name) + len(no_link) for name in names)
+        for name, item in zip(names, self.items):
+            value = f"[View Product]({item.link})" if item.link else "No link available"
+            extra = len(value) - len(no_link)
+            if len(value) > FIELD_VALUE_LIMIT or extra > budget:
+                value, extra = no_link, 0
+            budget -= extra
+            embed.add_field(name=name, value=value, inline=False)
+
+        # Show the first item's search thumbnail, if we have one
+        for item in self.items:
+            thumbnail = (item.item_metadata or {}).get("thumbnail")
+            if thumbnail:
+                embed.set_thumbnail(url=thumbnail)
+                break
+
+        embed.set_footer(text=footer)
+        self._update_buttons()
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("This isn't your wishlist.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, emoji="⬅️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        try:
+            self._load_page(backwards=True)
+            await interaction.response.edit_message(embed=self.build_embed(), view=self)
+        except Exception as e:
+            print(f"Wishlist paging error: {e}")
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, emoji="➡️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        try:
+            self._load_page(backwards=False)
+            await interaction.response.edit_message(embed=self.build_embed(), view=self)
+        except Exception as e:
+            print(f"Wishlist paging error: {e}")
+
+    async def on_timeout(self):
+        # Disable the buttons once the view stops listening
+        if self.message:
+            for child in self.children:
+                child.disabled = True
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass